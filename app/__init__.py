@@ -14,6 +14,8 @@ from .routes.reminder_routes import reminder_bp
 from .routes.report_routes import report_bp
 from .routes.search_routes import search_bp
 from .routes.team_routes import team_bp
+from .routes.stats_routes import stats_bp
+from .routes.job_routes import job_bp
 from .models.team_model import Team
 from .models.team_member_model import TeamMember
 from .models.team_event_model import TeamEvent
@@ -21,7 +23,15 @@ from .models.team_invite_model import TeamInvite
 from .models.meeting_model import Meeting
 from .models.folder_model import Folder
 from .models.file_model import File
+from .models.embedding_cache_model import EmbeddingCache
+from .models.ingest_job_model import IngestJob
+from .models.transcript_segment_model import TranscriptSegment
+from .models.summary_section_model import SummarySection
+from .models.llm_cache_model import LLMResponseCache
+from .models.lease_model import Lease
 from .services.plan_service import ensure_default_upgrade_codes
+from .services.job_service import start_job_workers
+from .services.transcription_gateway import gateway
 import app.sockets.meeting_socket
 import app.sockets.notification_socket
 
@@ -31,7 +41,8 @@ def create_app():
     app.config.from_object(Config)
 
     db.init_app(app)
-    socketio.init_app(app, cors_allowed_origins="*")
+    # Nhiều worker: emit đi qua message queue để tới client dù client nối vào worker khác
+    socketio.init_app(app, cors_allowed_origins="*", message_queue=Config.SOCKETIO_MESSAGE_QUEUE)
 
     app.register_blueprint(bp)
     app.register_blueprint(auth_bp)
@@ -46,6 +57,8 @@ def create_app():
     app.register_blueprint(report_bp)
     app.register_blueprint(search_bp)
     app.register_blueprint(team_bp)
+    app.register_blueprint(stats_bp)
+    app.register_blueprint(job_bp)
 
     # Seed default upgrade codes (admin will distribute these)
     try:
@@ -62,7 +75,26 @@ def create_app():
         TeamMember.ensure_indexes()
         TeamEvent.ensure_indexes()
         TeamInvite.ensure_indexes()
+        EmbeddingCache.ensure_indexes()
+        IngestJob.ensure_indexes()
+        TranscriptSegment.ensure_indexes()
+        SummarySection.ensure_indexes()
+        LLMResponseCache.ensure_indexes()
+        Lease.ensure_indexes()
     except Exception as e:
         print(f"Failed to ensure indexes: {e}")
 
+    # Worker ingest chạy nền (chunk + embedding)
+    try:
+        start_job_workers()
+    except Exception as e:
+        print(f"Failed to start job workers: {e}")
+
+    # Gateway Speechmatics khởi động sớm để pool kịp bắt tay trước cuộc họp đầu tiên
+    if Config.SM_POOL_SIZE > 0 and Config.SPEECHMATICS_API_KEY:
+        try:
+            gateway.start()
+        except Exception as e:
+            print(f"Failed to start transcription gateway: {e}")
+
     return app
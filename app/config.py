@@ -12,4 +12,80 @@ class Config:
     SPEECHMATICS_API_KEY = os.getenv("SPEECHMATICS_API_KEY")
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     SM_URL = "wss://eu.rt.speechmatics.com/v2"
-    HEADER_LEN = 5
\ No newline at end of file
+    SM_HANDSHAKE_TIMEOUT = float(os.getenv("SM_HANDSHAKE_TIMEOUT", "10"))
+    # Pool phiên Speechmatics bắt tay sẵn (0 = tắt)
+    SM_POOL_SIZE = int(os.getenv("SM_POOL_SIZE", "2"))
+    SM_POOL_MAX_IDLE_SECONDS = float(os.getenv("SM_POOL_MAX_IDLE_SECONDS", "45"))
+    SM_POOL_CHECK_SECONDS = float(os.getenv("SM_POOL_CHECK_SECONDS", "5"))
+    SM_POOL_LANGUAGES = [lang for lang in os.getenv("SM_POOL_LANGUAGES", "vi").split(",") if lang]
+    HEADER_LEN = 5
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "8000"))
+    EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "3"))
+    EMBEDDING_RETRY_BACKOFF = 0.5
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+    CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "300"))
+    CHUNK_OVERLAP_SENTENCES = int(os.getenv("CHUNK_OVERLAP_SENTENCES", "1"))
+    EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF = 5
+    JOB_STALE_SECONDS = 600
+    TRANSCRIPT_FLUSH_SEGMENTS = int(os.getenv("TRANSCRIPT_FLUSH_SEGMENTS", "10"))
+    TRANSCRIPT_FLUSH_MS = int(os.getenv("TRANSCRIPT_FLUSH_MS", "2000"))
+    TRANSCRIPT_FINAL_FLUSH_RETRIES = int(os.getenv("TRANSCRIPT_FINAL_FLUSH_RETRIES", "3"))
+    LIVE_INDEX_ENABLED = os.getenv("LIVE_INDEX_ENABLED", "true").lower() == "true"
+    LIVE_INDEX_WINDOW_SENTENCES = int(os.getenv("LIVE_INDEX_WINDOW_SENTENCES", "4"))
+    LIVE_INDEX_FLUSH_SECONDS = float(os.getenv("LIVE_INDEX_FLUSH_SECONDS", "5"))
+    # Job ingest meeting chờ phiên stream flush xong chunk live (worker chết -> hết giờ thì ingest lại)
+    LIVE_INDEX_CLOSE_WAIT_SECONDS = float(os.getenv("LIVE_INDEX_CLOSE_WAIT_SECONDS", "120"))
+    VECTOR_INDEX_MAX_ENTRIES = int(os.getenv("VECTOR_INDEX_MAX_ENTRIES", "64"))
+    VECTOR_INDEX_QUANTIZE_MIN_ROWS = int(os.getenv("VECTOR_INDEX_QUANTIZE_MIN_ROWS", "20000"))
+    VECTOR_INDEX_RERANK_FACTOR = 8
+    # Nhiều worker: kiểm tra version trong Mongo để bỏ index đã cũ (chunk đổi ở worker khác)
+    VECTOR_INDEX_SYNC = os.getenv(
+        "VECTOR_INDEX_SYNC", "true" if int(os.getenv("WEB_WORKERS", "1")) > 1 else "false"
+    ).lower() == "true"
+    VECTOR_INDEX_SYNC_SECONDS = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", "2"))
+    HYBRID_CANDIDATE_FACTOR = 4
+    HYBRID_RRF_K = 60
+    # 3200 byte = 100 ms PCM s16le 16 kHz mono
+    AUDIO_PACKET_BYTES = int(os.getenv("AUDIO_PACKET_BYTES", "3200"))
+    AUDIO_BUFFER_BYTES = int(os.getenv("AUDIO_BUFFER_BYTES", "160000"))
+    AUDIO_OVERFLOW_POLICY = os.getenv("AUDIO_OVERFLOW_POLICY", "drop_oldest")
+    AUDIO_MAX_BACKLOG_PACKETS = int(os.getenv("AUDIO_MAX_BACKLOG_PACKETS", "50"))
+    PARTIALS_MAX_PER_SECOND = float(os.getenv("PARTIALS_MAX_PER_SECOND", "4"))
+    ADPCM_BLOCK_ALIGN = int(os.getenv("ADPCM_BLOCK_ALIGN", "256"))
+    # Cache câu trả lời LLM (summary, agenda, chat)
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 3600)))
+    # Tóm tắt map-reduce cho transcript dài
+    SUMMARY_SINGLE_PASS_TOKENS = int(os.getenv("SUMMARY_SINGLE_PASS_TOKENS", "12000"))
+    SUMMARY_SECTION_TOKENS = int(os.getenv("SUMMARY_SECTION_TOKENS", "6000"))
+    SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+    # Gộp các request tóm tắt trùng meeting (single-flight + lease Mongo)
+    SINGLE_FLIGHT_LEASE_SECONDS = int(os.getenv("SINGLE_FLIGHT_LEASE_SECONDS", "60"))
+    SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv("SINGLE_FLIGHT_POLL_SECONDS", "1"))
+    SINGLE_FLIGHT_WAIT_SECONDS = int(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "600"))
+    # Tóm tắt cuốn chiếu trong lúc họp (in_meeting_ai)
+    ROLLING_SUMMARY_INTERVAL_SECONDS = float(os.getenv("ROLLING_SUMMARY_INTERVAL_SECONDS", "60"))
+    ROLLING_SUMMARY_MIN_TOKENS = int(os.getenv("ROLLING_SUMMARY_MIN_TOKENS", "400"))
+    # Giám sát phiên stream
+    SESSION_IDLE_TIMEOUT_SECONDS = float(os.getenv("SESSION_IDLE_TIMEOUT_SECONDS", "120"))
+    SESSION_MAX_SECONDS = float(os.getenv("SESSION_MAX_SECONDS", str(8 * 3600)))
+    SESSION_CHECK_SECONDS = float(os.getenv("SESSION_CHECK_SECONDS", "5"))
+    SESSION_CLOSE_GRACE_SECONDS = float(os.getenv("SESSION_CLOSE_GRACE_SECONDS", "60"))
+    # Registry phiên: "memory" hoặc "unix:///run/s1/sessions.sock" (broker dùng chung giữa các worker)
+    SESSION_REGISTRY_URL = os.getenv("SESSION_REGISTRY_URL", "memory")
+    SESSION_REGISTRY_TTL = float(os.getenv("SESSION_REGISTRY_TTL", "30"))
+    SESSION_REGISTRY_TIMEOUT = float(os.getenv("SESSION_REGISTRY_TIMEOUT", "2"))
+    # Message queue cho Socket.IO khi chạy nhiều worker (VD: redis://localhost:6379/0)
+    SOCKETIO_MESSAGE_QUEUE = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", "1"))
+    # VAD bỏ bớt khoảng im lặng (bật/tắt theo gói: PLAN_LIMITS["vad"])
+    VAD_ENERGY_DBFS = float(os.getenv("VAD_ENERGY_DBFS", "-45"))
+    VAD_ZCR_MIN = float(os.getenv("VAD_ZCR_MIN", "0.25"))
+    VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "500"))
+    VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", "200"))
+    VAD_KEEPALIVE_SECONDS = float(os.getenv("VAD_KEEPALIVE_SECONDS", "5"))
@@ -13,7 +13,13 @@ class Chunk(db.Document):
 
     text = db.StringField(required=True)
 
-    embedding = db.ListField(db.FloatField(), required=True)
+    # Định dạng cũ: mảng double (BSON), chỉ còn để đọc dữ liệu chưa migrate
+    embedding = db.ListField(db.FloatField())
+
+    # Định dạng mới: vector float32/float16 đóng gói nhị phân (xem embedding_codec)
+    embedding_bin = db.BinaryField()
+
+    embedding_dtype = db.StringField(choices=["float32", "float16"])
 
     created_at = db.DateTimeField(default=datetime.utcnow)
     
@@ -0,0 +1,15 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class EmbeddingCache(db.Document):
+    """
+    Cache embedding theo nội dung: key = sha256(model + text đã chuẩn hoá).
+    Vector lưu dạng float32 nhị phân giống Chunk.embedding_bin.
+    """
+    key = db.StringField(required=True, unique=True)
+    model = db.StringField(required=True)
+    embedding_bin = db.BinaryField(required=True)
+    created_at = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'EmbeddingCache'}
@@ -0,0 +1,15 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class IndexVersion(db.Document):
+    """
+    Version của dữ liệu RAG theo folder / user, tăng mỗi khi chunk thay đổi.
+    Các worker so với version đã load để biết index trong bộ nhớ đã cũ.
+    key: "folder:<folder_id>", "user:<user_id>" hoặc "user:*" (mọi user).
+    """
+    key = db.StringField(primary_key=True, required=True)
+    version = db.IntField(default=0)
+    updated_at = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'IndexVersions'}
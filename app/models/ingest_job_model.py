@@ -0,0 +1,43 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class IngestJob(db.Document):
+    """
+    Job ingest chạy nền (chia chunk + embedding) cho file notebook hoặc transcript cuộc họp.
+    """
+    kind = db.StringField(required=True, choices=["file", "meeting"])
+    user_id = db.StringField(required=True)
+    payload = db.DictField(default=dict)
+
+    status = db.StringField(default="queued")  # queued, running, completed, failed
+    progress = db.FloatField(default=0.0)
+    attempts = db.IntField(default=0)
+    max_attempts = db.IntField(default=3)
+    error = db.StringField()
+    result = db.DictField()
+
+    next_run_at = db.DateTimeField(default=datetime.utcnow)
+    created_at = db.DateTimeField(default=datetime.utcnow)
+    updated_at = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'IngestJobs',
+        'indexes': ['user_id', 'status', 'created_at'],
+    }
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "kind": self.kind,
+            "user_id": self.user_id,
+            "payload": self.payload or {},
+            "status": self.status,
+            "progress": round(self.progress or 0.0, 4),
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "error": self.error,
+            "result": self.result or {},
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
@@ -0,0 +1,20 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class Lease(db.Document):
+    """
+    Khoá có thời hạn dùng chung giữa các process (VD: chỉ 1 worker tóm tắt 1 meeting).
+    Owner gia hạn định kỳ; process chết thì lease tự hết hạn.
+    """
+    key = db.StringField(primary_key=True, required=True)
+    owner = db.StringField(required=True)
+    acquired_at = db.DateTimeField(default=datetime.utcnow)
+    expires_at = db.DateTimeField(required=True)
+
+    meta = {
+        'collection': 'Leases',
+        'indexes': [
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0},
+        ],
+    }
@@ -0,0 +1,23 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class LLMResponseCache(db.Document):
+    """
+    Cache câu trả lời chat completion: key = sha256(model, temperature, messages, tham số).
+    Mongo tự xoá bản ghi khi quá expires_at (TTL index).
+    """
+    key = db.StringField(required=True, unique=True)
+    site = db.StringField()  # nơi gọi (summary, agenda, chat_meeting, ...)
+    model = db.StringField(required=True)
+    temperature = db.FloatField()
+    content = db.StringField(required=True)
+    created_at = db.DateTimeField(default=datetime.utcnow)
+    expires_at = db.DateTimeField(required=True)
+
+    meta = {
+        'collection': 'LLMResponseCache',
+        'indexes': [
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0},
+        ],
+    }
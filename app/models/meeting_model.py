@@ -18,6 +18,11 @@ class Meeting(db.Document):
     # Nội dung
     full_transcript = db.StringField() # Lưu toàn bộ văn bản
     speaker_names = db.DictField(default=dict)  # Map speakerId -> display name
+    live_indexed = db.BooleanField(default=False)  # Đã có chunk RAG tạo trong lúc họp
+    live_indexed_lines = db.IntField(default=0)  # Số câu transcript đã nằm trong chunk live
+    live_index_open = db.BooleanField(default=False)  # Phiên stream còn có thể thêm chunk live
+    live_summary = db.DictField()  # Tóm tắt cuốn chiếu trong lúc họp (in_meeting_ai)
+    live_summary_lines = db.IntField(default=0)  # Số câu transcript đã gộp vào live_summary
 
     # Tags/labels
     tags = db.ListField(db.StringField(), default=list)
@@ -26,6 +31,7 @@ class Meeting(db.Document):
     summary = db.StringField()
     action_items = db.ListField(db.StringField())
     key_decisions = db.ListField(db.StringField())
+    tasks_created = db.BooleanField(default=False)  # Đã tạo reminder từ action_items
 
     meta = {
         'collection': 'Meetings',
@@ -0,0 +1,17 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class SummarySection(db.Document):
+    """
+    Tóm tắt 1 đoạn transcript (bước map của map-reduce).
+    key = sha256(model + phiên bản prompt + nội dung đoạn), nên chạy lại chỉ gọi API cho đoạn chưa có.
+    """
+    key = db.StringField(required=True, unique=True)
+    model = db.StringField(required=True)
+    summary = db.StringField(default="")
+    action_items = db.ListField(db.StringField())
+    key_decisions = db.ListField(db.StringField())
+    created_at = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {'collection': 'SummarySection'}
@@ -0,0 +1,23 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class TranscriptSegment(db.Document):
+    """
+    1 câu transcript đã chốt của cuộc họp (append-only).
+    full_transcript của Meeting được dựng lại từ các segment theo seq.
+    """
+    sid = db.StringField(required=True)
+    seq = db.IntField(required=True)
+    speaker_id = db.StringField()
+    text = db.StringField(required=True)
+    start_time = db.FloatField()  # giây, tính từ đầu stream
+    end_time = db.FloatField()
+    created_at = db.DateTimeField(default=datetime.utcnow)
+
+    meta = {
+        'collection': 'TranscriptSegments',
+        'indexes': [
+            {'fields': ['sid', 'seq'], 'unique': True},
+        ],
+    }
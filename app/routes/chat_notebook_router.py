@@ -1,5 +1,8 @@
+import time
+
 from flask import Blueprint, request, jsonify
 from app.services.chat_notebook_service import ChatNotebookController
+from app.services.chat_stream import sse_response, stream_answer
 
 chat_bp = Blueprint("chat", __name__, url_prefix="/chat")
 
@@ -15,4 +18,24 @@ def chat_notebook():
         top_k=data.get("top_k", 5)
     )
 
-    return jsonify(response), status
\ No newline at end of file
+    return jsonify(response), status
+
+
+@chat_bp.route("/notebook/stream", methods=["POST"])
+def chat_notebook_stream():
+    # Server-Sent Events: meta (chunk_ids, file_ids) -> token ... -> done
+    started_at = time.time()
+    data = request.json
+
+    meta, tokens, error = ChatNotebookController.chat_bot_notebook_stream(
+        user_id=data.get("user_id"),
+        folder_id=data.get("folder_id"),
+        question=data.get("question"),
+        file_ids=data.get("file_ids"),
+        top_k=data.get("top_k", 5)
+    )
+    if error:
+        response, status = error
+        return jsonify(response), status
+
+    return sse_response(stream_answer("chat_notebook", meta, tokens, started_at))
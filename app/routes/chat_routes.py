@@ -1,25 +1,23 @@
+import time
+
 from flask import Blueprint, request, jsonify
 from app.services.rag_service import retrieve_relevant_chunks
 from openai import OpenAI
 from app.config import Config
 from app.models.meeting_model import Meeting # Import Meeting model để lấy transcript gốc
+from app.services.transcript_service import get_full_transcript
+from app.services.llm_cache import cached_completion, stream_completion
+from app.services.chat_stream import sse_response, stream_answer
 
 bp = Blueprint("chatm", __name__, url_prefix="/chat")
 client = OpenAI(api_key=Config.OPENAI_API_KEY)
 
-@bp.route("/meeting", methods=["POST"])
-def chat_with_meeting():
-    """
-    API Chat với nội dung cuộc họp sử dụng RAG + Fallback.
-    """
-    data = request.get_json()
-    query = data.get("query")
-    sid = data.get("sid") 
-    user_id = data.get("user_id", "default_user")
+CHAT_MODEL = "gpt-4o-mini"
+CHAT_TEMPERATURE = 0.5
 
-    if not query or not sid:
-        return jsonify({"error": "Missing query or sid"}), 400
 
+def _build_meeting_chat(user_id, sid, query):
+    """Tìm context (RAG, fallback transcript gốc) và dựng messages. Trả về (messages, source_type, chunk_ids)."""
     # 1. Thử tìm kiếm thông tin từ RAG (CSDL Vector)
     relevant_chunks = retrieve_relevant_chunks(user_id, query, top_k=3, folder_id=sid)
     
@@ -31,9 +29,9 @@ def chat_with_meeting():
         # Lấy transcript gốc từ bảng Meeting
         meeting = Meeting.objects(sid=sid).first()
         
-        if meeting and meeting.full_transcript:
+        raw_transcript = get_full_transcript(meeting)
+        if raw_transcript:
             # Cắt bớt transcript nếu quá dài để tránh tràn token (lấy tối đa 4000 ký tự)
-            raw_transcript = meeting.full_transcript
             if len(raw_transcript) > 4000:
                 raw_transcript = raw_transcript[:4000] + "..."
             
@@ -45,6 +43,7 @@ def chat_with_meeting():
     else:
         # Nếu có RAG thì dùng (chuẩn nhất)
         context_text = "\n".join([c.text for c in relevant_chunks])
+    chunk_ids = [str(c.id) for c in relevant_chunks or []]
 
     # 3. Tạo prompt cho AI
     system_prompt = f"""
@@ -62,20 +61,55 @@ def chat_with_meeting():
     Nếu trong context không có thông tin, hãy trả lời: "Xin lỗi, tôi không tìm thấy thông tin này trong nội dung cuộc họp."
     """
 
+    messages = [
+        {"role": "system", "content": "Bạn là trợ lý hữu ích, trả lời ngắn gọn súc tích."},
+        {"role": "user", "content": system_prompt}
+    ]
+    return messages, source_type, chunk_ids
+
+
+@bp.route("/meeting", methods=["POST"])
+def chat_with_meeting():
+    """
+    API Chat với nội dung cuộc họp sử dụng RAG + Fallback.
+    """
+    data = request.get_json()
+    query = data.get("query")
+    sid = data.get("sid") 
+    user_id = data.get("user_id", "default_user")
+
+    if not query or not sid:
+        return jsonify({"error": "Missing query or sid"}), 400
+
+    messages, source_type, _ = _build_meeting_chat(user_id, sid, query)
+
     try:
         # 4. Gọi OpenAI
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Bạn là trợ lý hữu ích, trả lời ngắn gọn súc tích."},
-                {"role": "user", "content": system_prompt}
-            ],
-            temperature=0.5
-        )
-        
-        answer = response.choices[0].message.content.strip()
+        # (câu hỏi + context giống hệt -> trả lại câu trả lời đã cache)
+        answer = cached_completion(client, "chat_meeting", CHAT_MODEL, messages, CHAT_TEMPERATURE).strip()
         return jsonify({"answer": answer, "source": source_type})
 
     except Exception as e:
         print(f"Chat error: {e}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route("/meeting/stream", methods=["POST"])
+def chat_with_meeting_stream():
+    """
+    Như /chat/meeting nhưng trả về Server-Sent Events: event `meta` (source, chunk_ids) trước,
+    sau đó `token` theo từng đoạn model sinh ra, cuối cùng `done`.
+    """
+    started_at = time.time()
+    data = request.get_json()
+    query = data.get("query")
+    sid = data.get("sid")
+    user_id = data.get("user_id", "default_user")
+
+    if not query or not sid:
+        return jsonify({"error": "Missing query or sid"}), 400
+
+    messages, source_type, chunk_ids = _build_meeting_chat(user_id, sid, query)
+    tokens = stream_completion(client, "chat_meeting", CHAT_MODEL, messages, CHAT_TEMPERATURE)
+    meta = {"source": source_type, "chunk_ids": chunk_ids}
+    return sse_response(stream_answer("chat_meeting", meta, tokens, started_at))
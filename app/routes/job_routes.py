@@ -0,0 +1,33 @@
+from flask import Blueprint, request, jsonify
+from app.models.ingest_job_model import IngestJob
+from app.services.job_service import get_job
+
+job_bp = Blueprint("jobs", __name__, url_prefix="/jobs")
+
+MAX_LIST_LIMIT = 100
+
+
+@job_bp.route("/<job_id>", methods=["GET"])
+def get_job_status(job_id):
+    try:
+        job = get_job(job_id)
+    except Exception:
+        job = None
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@job_bp.route("", methods=["GET"])
+def list_jobs():
+    user_id = request.args.get("user_id")
+    if not user_id:
+        return jsonify({"error": "Missing user_id"}), 400
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = min(max(1, limit), MAX_LIST_LIMIT)
+
+    jobs = IngestJob.objects(user_id=user_id).order_by("-created_at").limit(limit)
+    return jsonify([j.to_dict() for j in jobs]), 200
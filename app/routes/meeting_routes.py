@@ -5,6 +5,8 @@ from app.services.reminder_service import ReminderController
 from app.services.agenda_service import generate_next_meeting_agenda
 from app.models.meeting_model import Meeting
 from app.models.chunk_model import Chunk
+from app.services import vector_index
+from app.services.transcript_service import delete_segments
 
 meeting_bp = Blueprint("meetings", __name__, url_prefix="/meetings")
 
@@ -46,6 +48,8 @@ def delete_meeting(sid):
         # 2. Xóa các Chunks liên quan (RAG) trong bảng Chunks
         # (Trong model chunk_model ta dùng folder_id để lưu sid của meeting)
         deleted_chunks = Chunk.objects(folder_id=sid).delete()
+        vector_index.invalidate(folder_id=sid)
+        delete_segments(sid)
         print(f"Deleted {deleted_chunks} chunks for meeting {sid}")
 
         return jsonify({"message": "Meeting deleted successfully"}), 200
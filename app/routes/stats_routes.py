@@ -0,0 +1,56 @@
+from flask import Blueprint, jsonify
+from app.services import metrics_service
+from app.services.embedding_cache import cache as embedding_cache
+from app.services.llm_cache import cache as llm_cache
+from app.routes.summarize_routes import summarize_flight
+from app.services.speechmatics_pool import pool as sm_pool
+from app.services.transcription_gateway import gateway
+from app.sockets.session_supervisor import supervisor
+
+stats_bp = Blueprint("stats", __name__, url_prefix="/stats")
+
+
+@stats_bp.route("/embedding-cache", methods=["GET"])
+def get_embedding_cache_stats():
+    return jsonify(embedding_cache.stats()), 200
+
+
+@stats_bp.route("/llm-cache", methods=["GET"])
+def get_llm_cache_stats():
+    return jsonify(llm_cache.stats()), 200
+
+
+@stats_bp.route("/summarize", methods=["GET"])
+def get_summarize_stats():
+    return jsonify(summarize_flight.stats()), 200
+
+
+@stats_bp.route("/transcription", methods=["GET"])
+def get_transcription_stats():
+    return jsonify({
+        "active_sessions": len(gateway.session_ids()),
+        "pool": sm_pool.stats(),
+        "metrics": metrics_service.snapshot(),
+    }), 200
+
+
+@stats_bp.route("/chat", methods=["GET"])
+def get_chat_stats():
+    # Time-to-first-token / tổng thời gian của các endpoint chat stream
+    return jsonify({
+        site: {
+            "first_token_ms": metrics_service.summary(f"{site}_first_token_ms"),
+            "total_ms": metrics_service.summary(f"{site}_total_ms"),
+        }
+        for site in ("chat_meeting", "chat_notebook")
+    }), 200
+
+
+@stats_bp.route("/sessions", methods=["GET"])
+def get_session_stats():
+    sessions = supervisor.stats()
+    return jsonify({
+        "count": len(sessions),
+        "sessions": sessions,
+        "cluster": supervisor.cluster_stats(),
+    }), 200
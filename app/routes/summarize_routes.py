@@ -2,11 +2,18 @@ from flask import Blueprint, jsonify, request
 from app.services.openai_service import summarize_transcript
 from app.services.meeting_service import get_or_create_meeting, save_summary, apply_speaker_names
 from app.models.meeting_model import Meeting
-from app.services.rag_service import ingest_meeting_transcript
+from app.services.job_service import enqueue_job
+from app.services.transcript_service import materialize_transcript
+from app.services.rolling_summary_service import finalize_rolling_summary
+from app.services import rag_service  # noqa: F401 - đăng ký job handler "meeting"
 from app.services.reminder_service import ReminderController
+from app.services.single_flight import SingleFlight
 
 bp = Blueprint("summarize", __name__)
 
+# Nhiều tab / thành viên cùng mở 1 meeting vừa xong -> chỉ tóm tắt + ingest 1 lần
+summarize_flight = SingleFlight("summarize")
+
 @bp.route("/summarize/<sid>", methods=["GET"])
 def summarize_sid(sid):
     # Lấy user_id từ query params, ưu tiên user_id của meeting nếu có
@@ -21,6 +28,10 @@ def summarize_sid(sid):
             user_id = 'default_user'
         meeting = get_or_create_meeting(sid, user_id)
     
+    # Transcript chưa materialize (VD: stream bị ngắt) -> dựng từ segment
+    if not meeting.full_transcript:
+        meeting = materialize_transcript(sid) or meeting
+
     # Kiểm tra xem đã có transcript trong DB chưa
     if not meeting.full_transcript:
         return jsonify({"error": "No transcript found in database"}), 400
@@ -37,32 +48,59 @@ def summarize_sid(sid):
             "full_transcript": updated_transcript
         })
 
-    # 2. Gọi OpenAI để tóm tắt
-    try:
-        data = summarize_transcript(updated_transcript)
-        
+    def compute():
+        # Có bản tóm tắt cuốn chiếu (in_meeting_ai) -> chỉ cần gộp nốt phần cuối
+        data = finalize_rolling_summary(meeting, updated_transcript) or summarize_transcript(updated_transcript)
+
         # 3. Lưu kết quả vào Meeting DB
         save_summary(sid, data)
-        
+
         # 4. BẮT ĐẦU RAG: Ingest dữ liệu vào bảng Chunks để dùng cho Chat sau này
-        # Chạy ngầm hoặc trực tiếp tùy độ dài transcript
-        ingest_meeting_transcript(sid, user_id, updated_transcript)
-        
-        # 5. Optionally create tasks from action items
-        create_tasks = request.args.get("create_tasks", "false").lower() == "true"
-        if create_tasks and data.get("action_items"):
-            items = [{"title": x} for x in data.get("action_items")]
-            ReminderController.create_reminders_from_action_items(
-                user_id=user_id,
-                items=items,
-            )
+        # Chạy nền qua job queue, tiến độ đẩy về room của user qua Socket.IO
+        job = enqueue_job("meeting", user_id, {"sid": sid})
+        return {"data": data, "ingest_job_id": str(job.id)}
 
-        return jsonify({
+    def ready():
+        # Worker khác đã tóm tắt xong meeting này
+        done = Meeting.objects(sid=sid).only("summary", "action_items", "key_decisions").first()
+        if not done or not done.summary:
+            return None
+        return {
+            "data": {
+                "summary": done.summary,
+                "action_items": done.action_items,
+                "key_decisions": done.key_decisions,
+            },
+            "ingest_job_id": None,
+        }
+
+    # 2. Gọi OpenAI để tóm tắt (request trùng sid chờ và dùng chung kết quả)
+    try:
+        result, _ = summarize_flight.do(sid, compute, ready)
+        data = result["data"]
+
+        response = {
             "summary": data.get("summary", ""),
             "action_items": data.get("action_items", []),
             "key_decisions": data.get("key_decisions", []),
-            "full_transcript": updated_transcript
-        })
+            "full_transcript": updated_transcript,
+        }
+
+        # 5. Optionally create tasks from action items
+        # Request nào trong nhóm dùng chung kết quả yêu cầu cũng được, nhưng chỉ tạo 1 lần / meeting
+        create_tasks = request.args.get("create_tasks", "false").lower() == "true"
+        if create_tasks and data.get("action_items"):
+            claimed = Meeting.objects(sid=sid, tasks_created__ne=True).update_one(set__tasks_created=True)
+            if claimed:
+                items = [{"title": x} for x in data.get("action_items")]
+                ReminderController.create_reminders_from_action_items(
+                    user_id=user_id,
+                    items=items,
+                )
+            response["tasks_created"] = bool(claimed)
+        if result["ingest_job_id"]:
+            response["ingest_job_id"] = result["ingest_job_id"]
+        return jsonify(response)
     except Exception as e:
         print(f"Error summarizing: {e}")
         return jsonify({"error": str(e)}), 500
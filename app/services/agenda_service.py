@@ -2,6 +2,7 @@ import json
 from openai import OpenAI
 from app.config import Config
 from app.models.meeting_model import Meeting
+from app.services.llm_cache import cached_completion
 
 client = OpenAI(api_key=Config.OPENAI_API_KEY)
 
@@ -40,13 +41,13 @@ Lịch sử:
 {context}
 """
 
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-    )
-
-    raw = res.choices[0].message.content.strip()
+    raw = cached_completion(
+        client,
+        "agenda",
+        "gpt-4o-mini",
+        [{"role": "user", "content": prompt}],
+        0.2,
+    ).strip()
     if raw.startswith("```"):
         raw = raw.replace("```json", "").replace("```", "").strip()
 
@@ -0,0 +1,126 @@
+from app.config import Config
+from app.services.audio_codec import AudioDecoder
+
+SAMPLE_BYTES = 2  # pcm_s16le
+
+
+class AudioIngest:
+    """
+    Tầng nhận audio cho 1 phiên:
+    - Bỏ header HEADER_LEN bằng memoryview (không copy gói gốc).
+    - Giải mã μ-law / IMA-ADPCM về PCM s16le nếu client gửi audio nén.
+    - Gom các frame nhỏ thành gói cỡ packet_bytes (mặc định 100 ms PCM 16 kHz)
+      trước khi gửi lên Speechmatics.
+    - Ring buffer có giới hạn: khi upstream chậm (can_send=False) audio được giữ lại;
+      đầy thì xử lý theo policy "drop_oldest" hoặc "drop_newest" và đếm số byte bị bỏ.
+    """
+
+    def __init__(self, header_len=None, packet_bytes=None, capacity=None, policy=None, decoder=None):
+        self.header_len = Config.HEADER_LEN if header_len is None else header_len
+        self.packet_bytes = packet_bytes or Config.AUDIO_PACKET_BYTES
+        self.capacity = max(capacity or Config.AUDIO_BUFFER_BYTES, self.packet_bytes)
+        self.policy = policy or Config.AUDIO_OVERFLOW_POLICY
+        self.decoder = decoder or AudioDecoder()
+        if self.policy not in ("drop_oldest", "drop_newest"):
+            raise ValueError(f"Unknown audio overflow policy: {self.policy}")
+
+        self.buffer = bytearray(self.capacity)
+        self.head = 0  # vị trí byte cũ nhất
+        self.size = 0
+        self.counters = {
+            "frames_in": 0,
+            "frames_invalid": 0,
+            "wire_bytes_in": 0,
+            "bytes_in": 0,
+            "packets_out": 0,
+            "bytes_out": 0,
+            "bytes_dropped": 0,
+            "overflows": 0,
+        }
+
+    def _write(self, view):
+        n = len(view)
+        tail = (self.head + self.size) % self.capacity
+        first = min(n, self.capacity - tail)
+        self.buffer[tail:tail + first] = view[:first]
+        if first < n:
+            self.buffer[0:n - first] = view[first:]
+        self.size += n
+
+    def _read(self, n):
+        first = min(n, self.capacity - self.head)
+        out = bytes(self.buffer[self.head:self.head + first])
+        if first < n:
+            out += bytes(self.buffer[0:n - first])
+        self._discard(n)
+        return out
+
+    def _discard(self, n):
+        self.head = (self.head + n) % self.capacity
+        self.size -= n
+
+    def feed(self, data, can_send=True):
+        """
+        Nhận 1 gói từ client (có header), trả về list gói PCM đủ kích thước để gửi.
+        can_send=False: upstream đang tồn đọng, giữ audio trong ring buffer.
+        """
+        self.counters["frames_in"] += 1
+        view = memoryview(data)[self.header_len:]
+        if not len(view):
+            self.counters["frames_invalid"] += 1
+            return []
+        self.counters["wire_bytes_in"] += len(view)
+        view = memoryview(self.decoder.decode(view))
+        # Bỏ byte lẻ cuối để luôn thẳng hàng theo sample
+        view = view[:len(view) - len(view) % SAMPLE_BYTES]
+        if not len(view):
+            # ADPCM: chưa đủ 1 block
+            return self.drain() if can_send else []
+        self.counters["bytes_in"] += len(view)
+
+        free = self.capacity - self.size
+        if len(view) > free:
+            self.counters["overflows"] += 1
+            overflow = len(view) - free
+            if self.policy == "drop_newest":
+                self.counters["bytes_dropped"] += overflow
+                view = view[:free]
+            else:
+                drop = min(overflow, self.size)
+                self._discard(drop)
+                self.counters["bytes_dropped"] += drop
+                if overflow > drop:
+                    # Frame lớn hơn cả buffer: chỉ giữ phần cuối
+                    self.counters["bytes_dropped"] += overflow - drop
+                    view = view[overflow - drop:]
+        if len(view):
+            self._write(view)
+
+        return self.drain() if can_send else []
+
+    def drain(self):
+        """Lấy ra mọi gói đủ packet_bytes đang có trong buffer."""
+        packets = []
+        while self.size >= self.packet_bytes:
+            packets.append(self._read(self.packet_bytes))
+        self.counters["packets_out"] += len(packets)
+        self.counters["bytes_out"] += len(packets) * self.packet_bytes
+        return packets
+
+    def flush(self):
+        """Lấy phần audio còn lại (không đủ 1 gói) khi kết thúc phiên."""
+        packets = self.drain()
+        if self.size:
+            size = self.size
+            packets.append(self._read(size))
+            self.counters["packets_out"] += 1
+            self.counters["bytes_out"] += size
+        return packets
+
+    def stats(self):
+        return {
+            **self.counters,
+            "buffered_bytes": self.size,
+            "policy": self.policy,
+            "encoding": self.decoder.encoding,
+        }
@@ -1,9 +1,9 @@
-import math
 from openai import OpenAI
 import os
 from dotenv import load_dotenv
-from ..models.chunk_model import Chunk
 from ..services.usage_service import check_and_increment_qa
+from ..services.retrieval_service import search_chunks
+from ..services.llm_cache import cached_completion, stream_completion
 
 load_dotenv()
 
@@ -11,72 +11,65 @@ client = OpenAI(
     api_key=os.getenv("OPENAI_API_KEY")
 )
 
-def cosine_similarity(v1, v2):
-    dot = sum(a * b for a, b in zip(v1, v2))
-    norm1 = math.sqrt(sum(a * a for a in v1))
-    norm2 = math.sqrt(sum(b * b for b in v2))
-    return dot / (norm1 * norm2)
+NOTEBOOK_MODEL = "gpt-4.1-mini"
+
 
-def get_embedding(text):
-    res = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    )
-    return res.data[0].embedding
 class ChatNotebookController:
     @staticmethod
-    def chat_bot_notebook(user_id, folder_id, question, file_ids=None, top_k=5):
+    def _prepare(user_id, folder_id, question, file_ids=None, top_k=5):
+        """Kiểm tra quota, tìm chunk và dựng messages. Trả về (messages, chunks, None) hoặc (None, None, (error, status))."""
         if not all([user_id, folder_id, question]):
-            return {"error": "Missing required fields"}, 400
+            return None, None, ({"error": "Missing required fields"}, 400)
 
         allowed, error = check_and_increment_qa(user_id)
         if not allowed:
-            return {"error": error or "Q&A limit reached"}, 403
+            return None, None, ({"error": error or "Q&A limit reached"}, 403)
         
-        # Embedding câu hỏi
-        question_embedding = get_embedding(question)
-
-        # Lấy chunk trong folder
-        query = Chunk.objects(
-            user_id=user_id,
-            folder_id=folder_id
-        )
+        # Top K chunk trong folder (hybrid BM25 + vector)
+        if not (isinstance(file_ids, list) and len(file_ids) > 0):
+            file_ids = None
+        top_chunks = search_chunks(user_id, question, folder_id=folder_id, file_ids=file_ids, top_k=top_k)
 
-        if isinstance(file_ids, list) and len(file_ids) > 0:
-            query = query.filter(file_id__in=file_ids)
+        # Ghép context
+        context = "\n\n".join([chunk.text for chunk in top_chunks])
 
-        chunks = query
-        
-        # Tính similarity
-        scored_chunks = []
-        for chunk in chunks:
-            score = cosine_similarity(question_embedding, chunk.embedding)
-            scored_chunks.append((score, chunk.text))
-        
-        # Top K chunk
-        scored_chunks.sort(reverse=True, key=lambda x: x[0])
-        top_chunks = scored_chunks[:top_k]
+        messages = [
+            {
+                "role": "system",
+                "content": "Bạn là 1 chuyên gia giải thích phân tích nội dung dự trên notebook người dùng."
+            },
+            {
+                "role": "user",
+                "content": f"Context: {context}\n\nQuestion: {question}"
+            }
+        ]
+        return messages, top_chunks, None
 
-        # Ghép context
-        context = "\n\n".join([text for _, text in top_chunks])
+    @staticmethod
+    def chat_bot_notebook(user_id, folder_id, question, file_ids=None, top_k=5):
+        messages, _, error = ChatNotebookController._prepare(user_id, folder_id, question, file_ids, top_k)
+        if error:
+            return error
 
         # chat với openai
-        completion = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Bạn là 1 chuyên gia giải thích phân tích nội dung dự trên notebook người dùng."
-                },
-                {
-                    "role": "user",
-                    "content": f"Context: {context}\n\nQuestion: {question}"
-                }
-            ],
-            max_tokens=200,
-            temperature=0.2
-        )
-        answer = completion.choices[0].message.content
+        answer = cached_completion(client, "chat_notebook", NOTEBOOK_MODEL, messages, 0.2, max_tokens=200)
         return {
             "answer": answer,
         }, 200
+
+    @staticmethod
+    def chat_bot_notebook_stream(user_id, folder_id, question, file_ids=None, top_k=5):
+        """
+        Bản stream: trả về (meta, tokens, None) với tokens là generator các đoạn text,
+        hoặc (None, None, (error, status)).
+        """
+        messages, top_chunks, error = ChatNotebookController._prepare(user_id, folder_id, question, file_ids, top_k)
+        if error:
+            return None, None, error
+
+        meta = {
+            "chunk_ids": [str(chunk.id) for chunk in top_chunks],
+            "file_ids": list(dict.fromkeys(chunk.file_id for chunk in top_chunks)),
+        }
+        tokens = stream_completion(client, "chat_notebook", NOTEBOOK_MODEL, messages, 0.2, max_tokens=200)
+        return meta, tokens, None
@@ -0,0 +1,46 @@
+import json
+import time
+
+from flask import Response, stream_with_context
+
+from app.services import metrics_service
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_answer(site, meta, tokens, started_at):
+    """
+    Chuỗi Server-Sent Events cho 1 câu trả lời chat:
+    `meta` (nguồn, chunk ids) -> `token` {delta} ... -> `done` {answer} (hoặc `error`).
+    Ghi time-to-first-token (tính từ lúc nhận request) vào metric `<site>_first_token_ms`.
+    """
+    yield sse_event("meta", meta)
+
+    parts = []
+    try:
+        for delta in tokens:
+            if not parts:
+                metrics_service.record(f"{site}_first_token_ms", (time.time() - started_at) * 1000)
+            parts.append(delta)
+            yield sse_event("token", {"delta": delta})
+    except Exception as e:
+        print(f"[ChatStream] {site} error: {e}")
+        metrics_service.increment(f"{site}_stream_errors")
+        yield sse_event("error", {"error": str(e)})
+        return
+
+    metrics_service.record(f"{site}_total_ms", (time.time() - started_at) * 1000)
+    yield sse_event("done", {"answer": "".join(parts).strip()})
+
+
+def sse_response(events):
+    return Response(
+        stream_with_context(events),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # tắt buffer của nginx để token tới client ngay
+        },
+    )
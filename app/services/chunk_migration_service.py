@@ -0,0 +1,66 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from ..config import Config
+from ..models.chunk_model import Chunk
+from .embedding_codec import pack_embedding
+
+
+def migrate_chunk_embeddings(batch_size=500, dtype=None, start_after=None, max_batches=None):
+    """
+    Chuyển Chunk.embedding (mảng double) sang embedding_bin (float32/float16 nhị phân).
+
+    Có thể chạy lại bất cứ lúc nào: chỉ những chunk chưa có embedding_bin mới được xử lý,
+    và mỗi batch được ghi xong trước khi sang batch sau, nên nếu bị ngắt giữa chừng
+    thì lần chạy sau sẽ tiếp tục từ chỗ cũ. `start_after` (ObjectId/str) cho phép
+    bỏ qua phần đã quét khi chạy song song hoặc debug.
+    """
+    dtype = dtype or Config.EMBEDDING_STORAGE_DTYPE
+    collection = Chunk._get_collection()
+
+    match = {
+        "embedding_bin": {"$exists": False},
+        "embedding.0": {"$exists": True},
+    }
+    last_id = ObjectId(start_after) if start_after else None
+    migrated = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        query = dict(match)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        docs = list(
+            collection.find(query, {"embedding": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        if not docs:
+            break
+
+        ops = []
+        for doc in docs:
+            raw, used_dtype = pack_embedding(doc["embedding"], dtype)
+            ops.append(UpdateOne(
+                {"_id": doc["_id"], "embedding_bin": {"$exists": False}},
+                {
+                    "$set": {"embedding_bin": raw, "embedding_dtype": used_dtype},
+                    "$unset": {"embedding": ""},
+                },
+            ))
+
+        result = collection.bulk_write(ops, ordered=False)
+        migrated += result.modified_count
+        last_id = docs[-1]["_id"]
+        batches += 1
+        print(f"[Migrate] {migrated} chunks converted (last _id={last_id})")
+
+    return {"migrated": migrated, "last_id": str(last_id) if last_id else None}
+
+
+if __name__ == "__main__":
+    from app import create_app
+
+    with create_app().app_context():
+        print(migrate_chunk_embeddings())
@@ -1,4 +1,10 @@
 from ..models.chunk_model import Chunk
+from ..services import vector_index
+from ..services.embedding_codec import chunk_fields, doc_vector
+
+def _embedding_list(chunk):
+    vector = doc_vector(chunk)
+    return vector.tolist() if vector is not None else []
 
 class ChunkController:
     @staticmethod
@@ -11,12 +17,13 @@ class ChunkController:
             file_id=file_id,
             chunk_index=chunk_index,
             text=text,
-            embedding=embedding
+            **chunk_fields(embedding)
         )
         chunk.save()
+        vector_index.add_chunks([chunk])
         return {"id": str(chunk.id), "chunk_index": chunk.chunk_index}, 201
     @staticmethod
     def get_chunks_by_folder(folder_id):
         chunks = Chunk.objects(folder_id=folder_id)
-        chunk_list = [{"id": str(chunk.id), "chunk_index": chunk.chunk_index, "text": chunk.text, "embedding": chunk.embedding, "created_at": chunk.created_at.isoformat()} for chunk in chunks]
+        chunk_list = [{"id": str(chunk.id), "chunk_index": chunk.chunk_index, "text": chunk.text, "embedding": _embedding_list(chunk), "created_at": chunk.created_at.isoformat()} for chunk in chunks]
         return chunk_list, 200
\ No newline at end of file
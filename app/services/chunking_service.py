@@ -0,0 +1,124 @@
+import re
+
+from ..config import Config
+from .embedding_cache import normalize_text
+from .embedding_service import estimate_tokens
+
+# Kết thúc câu: . ! ? … (có thể kèm ngoặc/nháy) rồi tới khoảng trắng
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+")
+_SPEAKER_LINE = re.compile(r"^\s*([^:\n]{1,60}):\s*(.*)$")
+
+
+def split_sentences(text):
+    """Tách văn bản thành câu: theo đoạn (dòng) rồi theo dấu kết thúc câu."""
+    sentences = []
+    for paragraph in (text or "").splitlines():
+        for sentence in _SENTENCE_END.split(paragraph):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def split_transcript_turns(transcript, max_tokens=None):
+    """
+    Tách transcript dạng "Người nói: nội dung" thành lượt nói,
+    gộp các dòng liên tiếp của cùng 1 người nói thành 1 lượt.
+    Lượt dài hơn max_tokens được tách thành từng câu, mỗi câu lặp lại tên người nói.
+    """
+    max_tokens = max_tokens or Config.CHUNK_MAX_TOKENS
+    turns = []  # (speaker, [câu])
+    for line in (transcript or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _SPEAKER_LINE.match(line)
+        speaker, content = (match.group(1).strip(), match.group(2).strip()) if match else (None, line)
+        sentences = split_sentences(content)
+        if not sentences:
+            continue
+        if turns and speaker == turns[-1][0]:
+            turns[-1][1].extend(sentences)
+        else:
+            turns.append((speaker, sentences))
+
+    units = []
+    for speaker, sentences in turns:
+        prefix = f"{speaker}: " if speaker else ""
+        turn = prefix + " ".join(sentences)
+        if estimate_tokens(turn) <= max_tokens:
+            units.append(turn)
+        else:
+            # Độc thoại dài: mỗi câu 1 đơn vị (kèm tên người nói) để cắt chunk và overlap theo câu
+            units.extend(prefix + sentence for sentence in sentences)
+    return units
+
+
+def _split_long_unit(unit, max_tokens):
+    """Câu dài hơn ngân sách token -> cắt theo từ."""
+    pieces, current = [], []
+    for word in unit.split():
+        if current and estimate_tokens(" ".join(current + [word])) > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def pack_units(units, max_tokens=None, overlap=None, separator=" "):
+    """
+    Gộp các đơn vị (câu / lượt nói) thành chunk không vượt quá max_tokens.
+    Chunk sau lặp lại `overlap` đơn vị cuối của chunk trước (nếu vẫn vừa ngân sách).
+    """
+    max_tokens = max_tokens or Config.CHUNK_MAX_TOKENS
+    overlap = Config.CHUNK_OVERLAP_SENTENCES if overlap is None else overlap
+
+    expanded = []
+    for unit in units:
+        if estimate_tokens(unit) > max_tokens:
+            expanded.extend(_split_long_unit(unit, max_tokens))
+        else:
+            expanded.append(unit)
+
+    chunks, current, current_tokens = [], [], 0
+    fresh = 0  # số đơn vị mới (không phải overlap) trong chunk hiện tại
+    for unit in expanded:
+        tokens = estimate_tokens(unit)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(separator.join(current))
+            carry = current[-overlap:] if overlap and fresh else []
+            while carry and sum(estimate_tokens(u) for u in carry) + tokens > max_tokens:
+                carry = carry[1:]
+            current, current_tokens, fresh = list(carry), sum(estimate_tokens(u) for u in carry), 0
+        current.append(unit)
+        current_tokens += tokens
+        fresh += 1
+    if current and fresh:
+        chunks.append(separator.join(current))
+    return chunks
+
+
+def dedupe_chunks(texts):
+    """Bỏ chunk trùng nội dung (sau khi chuẩn hoá khoảng trắng/Unicode), giữ thứ tự."""
+    seen = set()
+    result = []
+    for text in texts:
+        key = normalize_text(text).lower()
+        if key and key not in seen:
+            seen.add(key)
+            result.append(text)
+    return result
+
+
+def chunk_document(text, max_tokens=None, overlap=None):
+    """Chunk cho file notebook: list {"chunk_index", "text"}."""
+    texts = dedupe_chunks(pack_units(split_sentences(text), max_tokens, overlap))
+    return [{"chunk_index": i, "text": t} for i, t in enumerate(texts)]
+
+
+def chunk_transcript(transcript, max_tokens=None, overlap=None):
+    """Chunk cho transcript cuộc họp: gộp lượt nói theo ngân sách token."""
+    units = split_transcript_turns(transcript, max_tokens)
+    return dedupe_chunks(pack_units(units, max_tokens, overlap, separator="\n"))
@@ -0,0 +1,125 @@
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from ..config import Config
+from ..models.embedding_cache_model import EmbeddingCache
+from .embedding_codec import pack_embedding, unpack_embedding
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Chuẩn hoá Unicode (NFC) và khoảng trắng để text giống nhau cho cùng 1 key."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def cache_key(model, text):
+    return hashlib.sha256(f"{model}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCacheStore:
+    """
+    Cache 2 tầng: LRU trong process + collection EmbeddingCache trong Mongo.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "persistent_errors": 0,
+        }
+
+    def _remember(self, key, vector):
+        self.entries[key] = vector
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_many(self, keys):
+        """Trả về dict key -> vector (float32) cho các key đã có trong cache."""
+        found = {}
+        missing = []
+        with self.lock:
+            for key in keys:
+                vector = self.entries.get(key)
+                if vector is not None:
+                    self.entries.move_to_end(key)
+                    found[key] = vector
+                else:
+                    missing.append(key)
+            self.counters["memory_hits"] += len(found)
+
+        if missing:
+            try:
+                docs = EmbeddingCache.objects(key__in=missing).only("key", "embedding_bin").as_pymongo()
+                persisted = {doc["key"]: unpack_embedding(doc["embedding_bin"]) for doc in docs}
+            except Exception as e:
+                print(f"[EmbeddingCache] Lookup failed: {e}")
+                persisted = {}
+                with self.lock:
+                    self.counters["persistent_errors"] += 1
+
+            with self.lock:
+                for key, vector in persisted.items():
+                    self._remember(key, vector)
+                self.counters["persistent_hits"] += len(persisted)
+                self.counters["misses"] += len(missing) - len(persisted)
+            found.update(persisted)
+
+        return found
+
+    def put_many(self, model, items):
+        """items: list (key, vector). Ghi vào LRU và upsert vào Mongo."""
+        if not items:
+            return
+        with self.lock:
+            for key, vector in items:
+                self._remember(key, vector)
+
+        ops = []
+        for key, vector in items:
+            raw, _ = pack_embedding(vector, "float32")
+            ops.append(UpdateOne(
+                {"key": key},
+                {"$setOnInsert": {
+                    "key": key,
+                    "model": model,
+                    "embedding_bin": raw,
+                    "created_at": datetime.utcnow(),
+                }},
+                upsert=True,
+            ))
+        try:
+            EmbeddingCache._get_collection().bulk_write(ops, ordered=False)
+        except Exception as e:
+            print(f"[EmbeddingCache] Persist failed: {e}")
+            with self.lock:
+                self.counters["persistent_errors"] += 1
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            size = len(self.entries)
+        hits = counters["memory_hits"] + counters["persistent_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "hits": hits,
+            "lookups": lookups,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": size,
+            "memory_capacity": self.max_entries,
+        }
+
+
+cache = EmbeddingCacheStore(Config.EMBEDDING_CACHE_SIZE)
@@ -0,0 +1,71 @@
+import numpy as np
+
+from ..config import Config
+
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+def pack_embedding(vector, dtype=None):
+    """
+    Đóng gói vector thành bytes little-endian.
+    Trả về (bytes, dtype) để gán vào Chunk.embedding_bin / embedding_dtype.
+    """
+    dtype = dtype or Config.EMBEDDING_STORAGE_DTYPE
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}")
+    arr = np.asarray(vector, dtype=np.dtype(dtype).newbyteorder("<"))
+    return arr.tobytes(), dtype
+
+
+def unpack_embedding(raw, dtype="float32"):
+    """Đọc bytes thành mảng NumPy (read-only view, không copy)."""
+    return np.frombuffer(raw, dtype=np.dtype(dtype or "float32").newbyteorder("<"))
+
+
+def chunk_fields(vector, dtype=None):
+    """Các field embedding để truyền vào Chunk(...)."""
+    raw, dtype = pack_embedding(vector, dtype)
+    return {"embedding_bin": raw, "embedding_dtype": dtype}
+
+
+def doc_vector(doc):
+    """
+    Lấy vector từ 1 Chunk hoặc 1 dict raw (as_pymongo).
+    Ưu tiên định dạng nhị phân, fallback sang mảng cũ. Trả về None nếu không có.
+    """
+    if isinstance(doc, dict):
+        raw = doc.get("embedding_bin")
+        dtype = doc.get("embedding_dtype")
+        legacy = doc.get("embedding")
+    else:
+        raw = doc.embedding_bin
+        dtype = doc.embedding_dtype
+        legacy = doc.embedding
+
+    if raw:
+        return unpack_embedding(raw, dtype)
+    if legacy:
+        return np.asarray(legacy, dtype=np.float32)
+    return None
+
+
+def stack_vectors(vectors):
+    """
+    Ghép các vector (float32/float16, cùng số chiều) vào 1 ma trận float32 liền mạch.
+    Vector khác số chiều với vector đầu tiên bị bỏ qua; trả về (matrix, mask giữ lại).
+    """
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32), []
+
+    dim = vectors[0].shape[0]
+    keep = [v.shape[0] == dim for v in vectors]
+    matrix = np.empty((sum(keep), dim), dtype=np.float32)
+    row = 0
+    for v, ok in zip(vectors, keep):
+        if ok:
+            matrix[row] = v
+            row += 1
+    return matrix, keep
+
+
+EMBEDDING_PROJECTION = ("embedding_bin", "embedding_dtype", "embedding")
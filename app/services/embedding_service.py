@@ -0,0 +1,103 @@
+import time
+
+import eventlet
+import numpy as np
+from openai import OpenAI
+
+from ..config import Config
+from .embedding_cache import cache, cache_key
+
+client = OpenAI(api_key=Config.OPENAI_API_KEY)
+
+# OpenAI giới hạn 2048 input cho mỗi request embeddings
+MAX_INPUTS_PER_REQUEST = 2048
+
+
+def estimate_tokens(text):
+    """Ước lượng số token (thiên về dư) mà không cần tokenizer: ~2 ký tự/token cho tiếng Việt."""
+    return len(text) // 2 + 1
+
+
+def make_batches(texts, max_tokens=None, max_inputs=MAX_INPUTS_PER_REQUEST):
+    """
+    Gom index của các text thành batch sao cho tổng token ước lượng
+    không vượt quá max_tokens. Text quá dài vẫn đi 1 mình 1 batch.
+    """
+    max_tokens = max_tokens or Config.EMBEDDING_BATCH_TOKENS
+    batches, current, current_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_inputs):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _embed_batch(texts, model, max_retries):
+    """Gọi embeddings.create cho 1 batch, retry riêng batch này với backoff khi lỗi."""
+    attempt = 0
+    while True:
+        try:
+            response = client.embeddings.create(model=model, input=texts)
+            data = sorted(response.data, key=lambda item: item.index)
+            return [item.embedding for item in data]
+        except Exception as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            delay = Config.EMBEDDING_RETRY_BACKOFF * (2 ** (attempt - 1))
+            print(f"[Embedding] Batch of {len(texts)} failed ({e}), retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def embed_texts(texts, model=None, max_tokens=None, concurrency=None, max_retries=None, progress=None):
+    """
+    Tạo embedding cho nhiều text (mảng float32, đúng thứ tự input).
+    Text đã có trong cache (theo nội dung) không gọi API; phần còn lại được
+    gom batch theo ngân sách token và chạy song song (giới hạn bởi concurrency).
+    `progress(done, total)` được gọi mỗi khi 1 batch xong.
+    """
+    if not texts:
+        return []
+
+    model = model or Config.EMBEDDING_MODEL
+    concurrency = concurrency or Config.EMBEDDING_MAX_CONCURRENCY
+    max_retries = Config.EMBEDDING_MAX_RETRIES if max_retries is None else max_retries
+
+    keys = [cache_key(model, t) for t in texts]
+    cached = cache.get_many(list(dict.fromkeys(keys)))
+
+    # Mỗi nội dung chưa có trong cache chỉ embed 1 lần
+    pending = {}
+    for i, key in enumerate(keys):
+        if key not in cached and key not in pending:
+            pending[key] = texts[i]
+    pending_keys = list(pending)
+    pending_texts = [pending[k] for k in pending_keys]
+
+    done = len(texts) - len(pending_texts)
+    if progress and done:
+        progress(done, len(texts))
+
+    def run(indexes):
+        return indexes, _embed_batch([pending_texts[i] for i in indexes], model, max_retries)
+
+    batches = make_batches(pending_texts, max_tokens=max_tokens)
+    pool = eventlet.GreenPool(max(1, concurrency))
+    for indexes, vectors in pool.imap(run, batches):
+        fresh = [(pending_keys[i], np.asarray(v, dtype=np.float32)) for i, v in zip(indexes, vectors)]
+        cache.put_many(model, fresh)
+        cached.update(fresh)
+        done += len(indexes)
+        if progress:
+            progress(min(done, len(texts)), len(texts))
+
+    return [cached[key] for key in keys]
+
+
+def embed_text(text, model=None):
+    return embed_texts([text], model=model)[0]
@@ -4,46 +4,20 @@ from ..models.file_model import File
 from ..models.folder_model import Folder
 from ..models.chunk_model import Chunk
 from ..services.plan_service import get_plan_limits, get_user_plan
-
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+from ..services import vector_index
+from ..services.embedding_codec import chunk_fields
+from ..services.embedding_service import embed_text, embed_texts
+from ..services.chunking_service import chunk_document
+from ..services.job_service import enqueue_job, register_job_handler
 
 class FileController:
 
-    def slipt_file_to_chunk(text, chunk_size=500, overlap=100):
-        chunks = []
-        start = 0
-        index = 0
-
-        text_length = len(text)
-
-        while start < text_length:
-            end = start + chunk_size
-            chunk_text = text[start:end]
-
-            chunks.append({
-                "chunk_index": index,
-                "text": chunk_text.strip()
-            })
-
-            index += 1
-            start += chunk_size - overlap
+    def slipt_file_to_chunk(text, max_tokens=None, overlap=None):
+        # Gộp câu theo ngân sách token, overlap tính theo số câu (xem chunking_service)
+        return chunk_document(text, max_tokens=max_tokens, overlap=overlap)
 
-        return chunks
-
-    def get_embedding(text: str) -> list[float]:
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return response.data[0].embedding
+    def get_embedding(text: str):
+        return embed_text(text)
 
     @staticmethod
     def upload_file(user_id, folder_id, filename, file_type, size, content):
@@ -75,32 +49,60 @@ class FileController:
 
         file_id = str(file.id)
 
+        # Chia chunk + embedding chạy nền, client theo dõi qua /jobs/<job_id>
+        # hoặc event "ingest_progress" trên Socket.IO
+        job = enqueue_job("file", user_id, {"file_id": file_id, "folder_id": folder_id})
+
+        return {
+            "file_id": file_id,
+            "filename": filename,
+            "job_id": str(job.id),
+            "status": job.status,
+        }, 202
+
+    @staticmethod
+    def index_file(file_id, progress=None):
+        """
+        Cắt content của file thành chunk, tạo embedding và lưu vào Chunks.
+        Chạy lại an toàn: chunk cũ của file bị xoá trước khi insert.
+        """
+        file = File.objects(id=file_id).first()
+        if not file:
+            return {"total_chunks": 0, "skipped": "file deleted"}
+
         # CẮT CONTENT THÀNH CHUNK
-        chunks = FileController.slipt_file_to_chunk(content)
+        chunks = FileController.slipt_file_to_chunk(file.content or "")
+
+        # Tạo embedding theo batch (song song, có retry)
+        chunks = [c for c in chunks if c["text"]]
+        embeddings = embed_texts([c["text"] for c in chunks], progress=progress)
 
         # LƯU CHUNK VÀO DB
         chunk_objects = []
-        for c in chunks:
-            # Tạo embedding
-            embedding = FileController.get_embedding(c["text"])
+        for c, embedding in zip(chunks, embeddings):
             chunk = Chunk(
-                user_id=user_id,
-                folder_id=folder_id,
+                user_id=file.user_id,
+                folder_id=file.folder_id,
                 file_id=file_id,
                 chunk_index=c["chunk_index"],
                 text=c["text"],
-                embedding=embedding
+                **chunk_fields(embedding)
             )
             chunk_objects.append(chunk)
 
+        Chunk.objects(file_id=file_id).delete()
+        vector_index.remove_file(file.user_id, file.folder_id, file_id)
         if chunk_objects:
-            Chunk.objects.insert(chunk_objects)
+            inserted = Chunk.objects.insert(chunk_objects)
+            vector_index.add_chunks(inserted)
 
-        return {
-            "file_id": file_id,
-            "filename": filename,
-            "total_chunks": len(chunk_objects)
-        }, 201
+        # File bị xoá trong lúc đang index -> dọn chunk vừa tạo
+        if not File.objects(id=file_id).first():
+            Chunk.objects(file_id=file_id).delete()
+            vector_index.remove_file(file.user_id, file.folder_id, file_id)
+            return {"total_chunks": 0, "skipped": "file deleted"}
+
+        return {"total_chunks": len(chunk_objects)}
 
     
     @staticmethod
@@ -125,6 +127,7 @@ class FileController:
         
          # Xoá tất cả chunk thuộc file này
         deleted_chunks = Chunk.objects(file_id=str(file.id)).delete()
+        vector_index.remove_file(file.user_id, file.folder_id, str(file.id))
 
         # Xoá file
         file.delete()
@@ -155,4 +158,11 @@ class FileController:
         buffer = BytesIO(text_bytes)
         buffer.seek(0)
         return buffer, file.filename, "text/plain", None, 200
-    
\ No newline at end of file
+
+
+@register_job_handler("file")
+def _run_file_job(job, report):
+    return FileController.index_file(
+        job.payload.get("file_id"),
+        progress=lambda done, total: report(done / total if total else 1.0),
+    )
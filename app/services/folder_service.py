@@ -2,6 +2,7 @@ from ..models.chunk_model import Chunk
 from ..models.file_model import File
 from ..models.folder_model import Folder
 from ..services.plan_service import get_plan_limits, get_user_plan
+from ..services import vector_index
 class FolderController:
     @staticmethod
     def create_folder(user_id, name, description=None):
@@ -45,6 +46,7 @@ class FolderController:
             # Xóa files và chunks trước
             File.objects(folder_id=folder_id).delete()
             Chunk.objects(folder_id=folder_id).delete()
+            vector_index.invalidate(folder_id=folder_id)
             
             # Xóa folder
             folder.delete()
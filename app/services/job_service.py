@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+
+import eventlet
+from eventlet.queue import Queue
+
+from app.config import Config
+from app.extensions import socketio
+from app.models.ingest_job_model import IngestJob
+
+_handlers = {}
+_queue = Queue()
+_workers = []
+
+
+def register_job_handler(kind):
+    """
+    Đăng ký hàm xử lý cho 1 loại job: handler(job, report) -> dict result.
+    `report(progress, message=None)` cập nhật tiến độ (0..1) và đẩy event cho client.
+    """
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def _emit(job, message=None):
+    data = {
+        "job_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "progress": round(job.progress or 0.0, 4),
+        "payload": job.payload or {},
+    }
+    if message:
+        data["message"] = message
+    if job.error and job.status == "failed":
+        data["error"] = job.error
+    if job.status == "completed":
+        data["result"] = job.result or {}
+    # Room theo user_id (join trong notification_socket.on_connect)
+    socketio.emit("ingest_progress", data, room=job.user_id)
+
+
+def enqueue_job(kind, user_id, payload, max_attempts=None):
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = IngestJob(
+        kind=kind,
+        user_id=user_id,
+        payload=payload or {},
+        max_attempts=max_attempts or Config.JOB_MAX_ATTEMPTS,
+    )
+    job.save()
+    _emit(job)
+    _queue.put(str(job.id))
+    return job
+
+
+def get_job(job_id):
+    return IngestJob.objects(id=job_id).first()
+
+
+def _claim(job_id):
+    # Claim nguyên tử để nhiều worker/process không chạy trùng 1 job
+    return IngestJob.objects(id=job_id, status="queued").modify(
+        set__status="running",
+        set__updated_at=datetime.utcnow(),
+        inc__attempts=1,
+        new=True,
+    )
+
+
+def _run(job_id):
+    job = _claim(job_id)
+    if not job:
+        return
+
+    handler = _handlers.get(job.kind)
+
+    def report(progress, message=None):
+        job.progress = max(0.0, min(1.0, float(progress)))
+        job.updated_at = datetime.utcnow()
+        IngestJob.objects(id=job.id).update_one(
+            set__progress=job.progress,
+            set__updated_at=job.updated_at,
+        )
+        _emit(job, message)
+
+    _emit(job)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for job kind: {job.kind}")
+        result = handler(job, report) or {}
+    except Exception as e:
+        print(f"[Jobs] {job.kind} job {job.id} failed (attempt {job.attempts}): {e}")
+        job.error = str(e)
+        job.updated_at = datetime.utcnow()
+        if job.attempts < job.max_attempts:
+            delay = Config.JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+            job.status = "queued"
+            job.next_run_at = job.updated_at + timedelta(seconds=delay)
+            job.save()
+            _emit(job, f"retrying in {delay:.0f}s")
+            eventlet.spawn_after(delay, _queue.put, str(job.id))
+        else:
+            job.status = "failed"
+            job.save()
+            _emit(job)
+        return
+
+    job.status = "completed"
+    job.progress = 1.0
+    job.result = result
+    job.error = None
+    job.updated_at = datetime.utcnow()
+    job.save()
+    _emit(job)
+
+
+def _worker_loop():
+    while True:
+        job_id = _queue.get()
+        try:
+            _run(job_id)
+        except Exception as e:
+            print(f"[Jobs] Worker error on job {job_id}: {e}")
+
+
+def _recover_pending_jobs():
+    """Nạp lại job còn dở khi process khởi động (job 'running' quá lâu coi như đã chết)."""
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=Config.JOB_STALE_SECONDS)
+    IngestJob.objects(status="running", updated_at__lt=stale_before).update(
+        set__status="queued",
+        set__updated_at=now,
+    )
+    for job in IngestJob.objects(status="queued").only("id", "next_run_at").order_by("created_at"):
+        delay = 0
+        if job.next_run_at and job.next_run_at > now:
+            delay = (job.next_run_at - now).total_seconds()
+        eventlet.spawn_after(delay, _queue.put, str(job.id))
+
+
+def start_job_workers(count=None):
+    if _workers:
+        return
+    count = Config.JOB_WORKERS if count is None else count
+    for _ in range(max(0, count)):
+        _workers.append(eventlet.spawn(_worker_loop))
+    if _workers:
+        _recover_pending_jobs()
@@ -0,0 +1,174 @@
+import math
+import re
+import threading
+import unicodedata
+from array import array
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_HAS_DIGIT = re.compile(r"\d")
+_MAX_TF = 65535
+
+
+def fold_diacritics(token):
+    """Bỏ dấu tiếng Việt: 'ngân' -> 'ngan', 'đ' -> 'd'."""
+    decomposed = unicodedata.normalize("NFD", token)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return stripped.replace("đ", "d").replace("Đ", "D")
+
+
+def tokenize(text):
+    """Tách từ (âm tiết) đã chuẩn hoá NFC + lowercase, giữ nguyên dấu."""
+    return _TOKEN.findall(unicodedata.normalize("NFC", text or "").lower())
+
+
+def index_terms(text):
+    """
+    Term để index: mỗi âm tiết có dấu được index cả dạng có dấu và dạng không dấu,
+    để câu hỏi gõ không dấu vẫn khớp, còn câu hỏi có dấu thì khớp chính xác.
+    """
+    terms = []
+    for token in tokenize(text):
+        terms.append(token)
+        folded = fold_diacritics(token)
+        if folded != token:
+            terms.append(folded)
+    return terms
+
+
+def query_terms(text):
+    # Token có dấu -> tìm đúng dạng có dấu; không dấu -> khớp cả bản không dấu đã index
+    return list(dict.fromkeys(tokenize(text)))
+
+
+def is_keyword_query(text):
+    """Câu hỏi dạng từ khoá: rất ngắn, hoặc chứa số/mã (VD: 'HĐ-2024-15', 'Q3')."""
+    tokens = tokenize(text)
+    if not tokens:
+        return False
+    return len(tokens) <= 3 or any(_HAS_DIGIT.search(t) for t in tokens)
+
+
+class LexicalIndex:
+    """
+    Inverted index BM25 trong bộ nhớ. Posting list lưu gọn bằng array
+    ('I' cho số thứ tự document, 'H' cho tần suất term).
+    Thêm document tăng dần (add); xoá theo file bằng tombstone (remove_file),
+    document đã xoá bị loại khỏi kết quả nhưng vẫn nằm trong posting list.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.rows = {}  # chunk_id -> row (chỉ document còn sống)
+        self.file_ids = np.empty(0, dtype=object)
+        self.postings = {}
+        self.doc_len = np.empty(0, dtype=np.float32)
+        self.deleted = np.zeros(0, dtype=bool)
+        self.avgdl = 0.0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def tombstones(self):
+        return len(self.ids) - len(self.rows)
+
+    def build(self, docs):
+        """docs: iterable (chunk_id, file_id, text)."""
+        return self.add(docs)
+
+    def add(self, docs):
+        """Thêm document (chunk_id, file_id, text); bỏ qua chunk_id đã có."""
+        with self.lock:
+            start = len(self.ids)
+            ids, file_ids, lengths = [], [], []
+            for chunk_id, file_id, text in docs:
+                if chunk_id in self.rows:
+                    continue
+                row = start + len(ids)
+                terms = index_terms(text)
+                counts = {}
+                for term in terms:
+                    counts[term] = counts.get(term, 0) + 1
+                for term, tf in counts.items():
+                    entry = self.postings.get(term)
+                    if entry is None:
+                        entry = self.postings[term] = (array("I"), array("H"))
+                    entry[0].append(row)
+                    entry[1].append(min(tf, _MAX_TF))
+                self.rows[chunk_id] = row
+                ids.append(chunk_id)
+                file_ids.append(file_id)
+                lengths.append(len(terms))
+
+            if ids:
+                self.ids.extend(ids)
+                self.file_ids = np.concatenate([self.file_ids, np.array(file_ids, dtype=object)])
+                self.doc_len = np.concatenate([self.doc_len, np.asarray(lengths, dtype=np.float32)])
+                self.deleted = np.concatenate([self.deleted, np.zeros(len(ids), dtype=bool)])
+                self._update_avgdl()
+        return self
+
+    def remove_file(self, file_id):
+        """Đánh dấu xoá mọi document của file_id, trả về số document bị xoá."""
+        with self.lock:
+            hit = (self.file_ids == file_id) & ~self.deleted
+            rows = np.flatnonzero(hit)
+            if rows.size:
+                self.deleted |= hit
+                for row in rows:
+                    self.rows.pop(self.ids[row], None)
+                self._update_avgdl()
+            return int(rows.size)
+
+    def _update_avgdl(self):
+        live = self.doc_len[~self.deleted]
+        self.avgdl = float(live.mean()) if live.size else 0.0
+
+    def search(self, query, top_k=5, file_ids=None):
+        """
+        Trả về (list (chunk_id, score), coverage) — coverage là tỉ lệ term
+        của câu hỏi xuất hiện trong document đứng đầu.
+        """
+        terms = query_terms(query)
+        if not terms or top_k <= 0:
+            return [], 0.0
+        with self.lock:
+            return self._search(terms, top_k, file_ids)
+
+    def _search(self, terms, top_k, file_ids):
+        n = len(self.rows)
+        if not n:
+            return [], 0.0
+
+        # df đếm cả document đã tombstone: idf lệch nhẹ tới khi index được build lại
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        matched = np.zeros(len(self.ids), dtype=np.int32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / (self.avgdl or 1.0))
+        for term in terms:
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            rows = np.frombuffer(entry[0], dtype=np.uint32)
+            tf = np.frombuffer(entry[1], dtype=np.uint16).astype(np.float32)
+            df = min(rows.shape[0], n)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm[rows])
+            matched[rows] += 1
+
+        candidates = np.flatnonzero((scores > 0) & ~self.deleted)
+        if file_ids:
+            candidates = candidates[np.isin(self.file_ids[candidates], list(file_ids))]
+        if candidates.size == 0:
+            return [], 0.0
+
+        k = min(top_k, candidates.size)
+        cand_scores = scores[candidates]
+        top = np.argpartition(-cand_scores, k - 1)[:k]
+        top = candidates[top[np.argsort(-cand_scores[top])]]
+        coverage = matched[top[0]] / len(terms)
+        return [(self.ids[row], float(scores[row])) for row in top], float(coverage)
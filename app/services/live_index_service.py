@@ -0,0 +1,94 @@
+import threading
+
+from app.config import Config
+from app.models.chunk_model import Chunk
+from app.models.meeting_model import Meeting
+from app.services import vector_index
+from app.services.embedding_codec import chunk_fields
+from app.services.embedding_service import embed_texts
+
+
+class LiveMeetingIndexer:
+    """
+    Index RAG tăng dần trong lúc đang họp.
+    Câu đã chốt (final) được gom thành cửa sổ vài câu; mỗi lần flush
+    embed các cửa sổ đã đủ trong 1 batch và append Chunk cho sid.
+    """
+
+    def __init__(self, sid, user_id, window_sentences=None):
+        self.sid = sid
+        self.user_id = user_id
+        self.window_sentences = window_sentences or Config.LIVE_INDEX_WINDOW_SENTENCES
+        self.pending = []
+        self.next_index = None
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+    def open(self):
+        """Đánh dấu phiên đang index live: job ingest chờ tới khi close() mới xử lý meeting."""
+        Meeting.objects(sid=self.sid).update_one(set__live_index_open=True)
+
+    def close(self):
+        Meeting.objects(sid=self.sid).update_one(set__live_index_open=False)
+
+    def add_sentence(self, line):
+        line = (line or "").strip()
+        if line:
+            with self.lock:
+                self.pending.append(line)
+
+    def _take_windows(self, force):
+        with self.lock:
+            size = self.window_sentences
+            full = len(self.pending) - len(self.pending) % size
+            take = len(self.pending) if force else full
+            sentences, self.pending = self.pending[:take], self.pending[take:]
+        return ["\n".join(sentences[i:i + size]) for i in range(0, len(sentences), size)]
+
+    def flush(self, force=False):
+        """
+        Embed + lưu các cửa sổ đã đủ câu (force=True: lưu cả phần còn dư, dùng khi kết thúc họp).
+        Chạy blocking, nên gọi trong executor.
+        """
+        with self.flush_lock:
+            windows = self._take_windows(force)
+            if not windows:
+                return 0
+
+            try:
+                embeddings = embed_texts(windows)
+                if self.next_index is None:
+                    self.next_index = Chunk.objects(folder_id=self.sid, file_id="meeting").count()
+
+                chunks = [
+                    Chunk(
+                        user_id=self.user_id,
+                        folder_id=self.sid,
+                        file_id="meeting",
+                        chunk_index=self.next_index + i,
+                        text=text,
+                        **chunk_fields(embedding)
+                    )
+                    for i, (text, embedding) in enumerate(zip(windows, embeddings))
+                ]
+                # Job ingest đã thay toàn bộ chunk của meeting (đóng index live) -> không thêm nữa
+                if not Meeting.objects(sid=self.sid, live_index_open=True).count():
+                    print(f"[LiveIndex] {self.sid} closed by ingest, dropping {len(chunks)} chunks")
+                    return 0
+                inserted = Chunk.objects.insert(chunks)
+            except Exception as e:
+                # Trả câu lại hàng đợi để lần flush sau thử tiếp
+                print(f"[LiveIndex] Flush failed for {self.sid}: {e}")
+                with self.lock:
+                    self.pending = [s for w in windows for s in w.split("\n")] + self.pending
+                return 0
+
+            self.next_index += len(chunks)
+            vector_index.add_chunks(inserted)
+            # Đếm số câu đã index: job ingest chỉ bỏ qua khi số này phủ hết transcript
+            lines = sum(len(w.split("\n")) for w in windows)
+            Meeting.objects(sid=self.sid).update_one(
+                set__live_indexed=True,
+                inc__live_indexed_lines=lines,
+            )
+            return len(chunks)
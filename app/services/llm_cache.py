@@ -0,0 +1,167 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from ..config import Config
+from ..models.llm_cache_model import LLMResponseCache
+
+
+def llm_cache_key(model, temperature, messages, **params):
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages, "params": params},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCacheStore:
+    """
+    Cache 2 tầng cho câu trả lời LLM: LRU có TTL trong process + collection LLMResponseCache.
+    Đếm hit/miss riêng cho từng nơi gọi (site).
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()  # key -> (content, expires_at epoch)
+        self.lock = threading.Lock()
+        self.sites = {}
+        self.persistent_errors = 0
+
+    def _count(self, site, field):
+        counters = self.sites.setdefault(site, {"memory_hits": 0, "persistent_hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def _remember(self, key, content, expires_at):
+        self.entries[key] = (content, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get(self, site, key):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self.entries.move_to_end(key)
+                    self._count(site, "memory_hits")
+                    return entry[0]
+                del self.entries[key]
+
+        try:
+            doc = LLMResponseCache.objects(key=key, expires_at__gt=datetime.utcnow()).only(
+                "content", "expires_at"
+            ).first()
+        except Exception as e:
+            print(f"[LLMCache] Lookup failed: {e}")
+            doc = None
+            with self.lock:
+                self.persistent_errors += 1
+
+        with self.lock:
+            if doc is None:
+                self._count(site, "misses")
+                return None
+            remaining = (doc.expires_at - datetime.utcnow()).total_seconds()
+            self._remember(key, doc.content, now + remaining)
+            self._count(site, "persistent_hits")
+        return doc.content
+
+    def put(self, site, key, model, temperature, content):
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+        with self.lock:
+            self._remember(key, content, time.time() + self.ttl_seconds)
+        try:
+            LLMResponseCache.objects(key=key).update_one(
+                set__site=site,
+                set__model=model,
+                set__temperature=temperature,
+                set__content=content,
+                set__created_at=datetime.utcnow(),
+                set__expires_at=expires_at,
+                upsert=True,
+            )
+        except Exception as e:
+            print(f"[LLMCache] Persist failed: {e}")
+            with self.lock:
+                self.persistent_errors += 1
+
+    def stats(self):
+        with self.lock:
+            sites = {site: dict(c) for site, c in self.sites.items()}
+            size = len(self.entries)
+            errors = self.persistent_errors
+        for counters in sites.values():
+            hits = counters["memory_hits"] + counters["persistent_hits"]
+            lookups = hits + counters["misses"]
+            counters["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+        return {
+            "sites": sites,
+            "memory_entries": size,
+            "memory_capacity": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent_errors": errors,
+        }
+
+
+cache = LLMResponseCacheStore(Config.LLM_CACHE_SIZE, Config.LLM_CACHE_TTL_SECONDS)
+
+
+def cached_completion(client, site, model, messages, temperature, **params):
+    """
+    chat.completions.create có cache: cùng model, temperature, messages và tham số
+    thì trả lại nội dung đã có thay vì gọi lại API. Trả về content (str).
+    """
+    key = llm_cache_key(model, temperature, messages, **params)
+    content = cache.get(site, key)
+    if content is not None:
+        return content
+
+    res = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        **params
+    )
+    content = res.choices[0].message.content or ""
+    if content.strip():
+        cache.put(site, key, model, temperature, content)
+    return content
+
+
+def stream_completion(client, site, model, messages, temperature, **params):
+    """
+    Bản stream của cached_completion: yield từng đoạn text khi model sinh ra.
+    Cache hit -> yield cả câu trả lời 1 lần. Chỉ cache khi stream chạy hết
+    (client ngắt giữa chừng thì không lưu câu trả lời dở).
+    """
+    key = llm_cache_key(model, temperature, messages, **params)
+    content = cache.get(site, key)
+    if content is not None:
+        yield content
+        return
+
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        stream=True,
+        **params
+    )
+    parts = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    content = "".join(parts)
+    if content.strip():
+        cache.put(site, key, model, temperature, content)
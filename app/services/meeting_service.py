@@ -3,7 +3,9 @@ import re
 from app.models.chunk_model import Chunk
 
 from ..models.meeting_model import Meeting
+from ..models.transcript_segment_model import TranscriptSegment
 from mongoengine.errors import NotUniqueError
+from . import vector_index
 
 def get_or_create_meeting(sid, user_id, title=None):
     """
@@ -27,21 +29,6 @@ def get_or_create_meeting(sid, user_id, title=None):
         meeting.save()
     return meeting
 
-def append_transcript(sid, text):
-    """
-    Nối thêm câu mới vào full_transcript của cuộc họp.
-    Gọi khi có kết quả chép lời hoàn chỉnh.
-    """
-    meeting = Meeting.objects(sid=sid).first()
-    if meeting:
-        if meeting.speaker_names:
-            text = apply_speaker_names(text, meeting.speaker_names)
-        if meeting.full_transcript:
-            meeting.full_transcript += "\n" + text
-        else:
-            meeting.full_transcript = text
-        meeting.save()
-
 def save_summary(sid, summary_data):
     """
     Lưu kết quả tóm tắt sau khi họp xong.
@@ -127,4 +114,6 @@ def delete_meeting_by_sid(sid):
 
     meeting.delete()
     Chunk.objects(folder_id=sid).delete()
+    vector_index.invalidate(folder_id=sid)
+    TranscriptSegment.objects(sid=sid).delete()
     return True
\ No newline at end of file
@@ -0,0 +1,42 @@
+from collections import deque
+
+import numpy as np
+
+# Số mẫu gần nhất giữ lại cho mỗi metric
+WINDOW = 1000
+
+_samples = {}
+_counters = {}
+
+
+def record(name, value):
+    """Ghi 1 mẫu (VD: độ trễ ms). An toàn khi gọi từ thread khác (deque.append là atomic)."""
+    series = _samples.get(name)
+    if series is None:
+        series = _samples.setdefault(name, deque(maxlen=WINDOW))
+    series.append(float(value))
+
+
+def increment(name, amount=1):
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def summary(name):
+    values = list(_samples.get(name, ()))
+    if not values:
+        return {"count": 0}
+    arr = np.asarray(values, dtype=np.float64)
+    return {
+        "count": int(arr.size),
+        "avg": round(float(arr.mean()), 2),
+        "p50": round(float(np.percentile(arr, 50)), 2),
+        "p95": round(float(np.percentile(arr, 95)), 2),
+        "max": round(float(arr.max()), 2),
+    }
+
+
+def snapshot():
+    return {
+        "timings": {name: summary(name) for name in list(_samples)},
+        "counters": dict(_counters),
+    }
@@ -1,10 +1,47 @@
+import hashlib
 import json
+
+import eventlet
 from openai import OpenAI
 from app.config import Config
+from app.models.summary_section_model import SummarySection
+from app.services.chunking_service import pack_units, split_transcript_turns
+from app.services.embedding_service import estimate_tokens
+from app.services.llm_cache import cached_completion
 
 client = OpenAI(api_key=Config.OPENAI_API_KEY)
 
-def summarize_transcript(transcript: str):
+SUMMARY_MODEL = "gpt-4o-mini"
+# Tăng khi đổi prompt map để không dùng lại cache cũ
+SECTION_PROMPT_VERSION = "v1"
+
+
+def complete_json(prompt, site="summary"):
+    """Gọi chat completion (có cache theo prompt) và parse JSON trong câu trả lời."""
+    raw = cached_completion(
+        client,
+        site,
+        SUMMARY_MODEL,
+        [{"role": "user", "content": prompt}],
+        0.2,
+    ).strip()
+
+    if not raw:
+        raise ValueError("OpenAI returned empty content")
+
+    # Nếu AI bọc JSON trong ```json ... ```
+    if raw.startswith("```"):
+        raw = raw.replace("```json", "").replace("```", "").strip()
+
+    try:
+        data = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"JSON parse failed: {e} | raw={raw}")
+
+    return data
+
+
+def _summarize_once(transcript):
     prompt = f"""
 Bạn là trợ lý họp.
 
@@ -16,25 +53,130 @@ Từ transcript sau, hãy trả về JSON gồm:
 Transcript:
 {transcript}
 """
+    return complete_json(prompt)
 
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2
-    )
 
-    raw = res.choices[0].message.content.strip()
+def _section_key(text):
+    raw = f"{SUMMARY_MODEL}\n{SECTION_PROMPT_VERSION}\n{text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-    if not raw:
-        raise ValueError("OpenAI returned empty content")
 
-    # Nếu AI bọc JSON trong ```json ... ```
-    if raw.startswith("```"):
-        raw = raw.replace("```json", "").replace("```", "").strip()
+def _summarize_section(index, total, text):
+    """Bước map: tóm tắt 1 đoạn, dùng kết quả đã cache nếu đoạn này đã từng tóm tắt."""
+    key = _section_key(text)
+    cached = SummarySection.objects(key=key).only("summary", "action_items", "key_decisions").first()
+    if cached:
+        return {
+            "summary": cached.summary,
+            "action_items": list(cached.action_items),
+            "key_decisions": list(cached.key_decisions),
+        }
 
-    try:
-        data = json.loads(raw)
-    except Exception as e:
-        raise ValueError(f"JSON parse failed: {e} | raw={raw}")
+    prompt = f"""
+Bạn là trợ lý họp. Đây là phần {index + 1}/{total} của transcript một cuộc họp dài.
+
+Chỉ dựa vào phần này, hãy trả về JSON gồm:
+- summary (tóm tắt ngắn gọn nội dung phần này)
+- action_items (list, việc cần làm được giao trong phần này, ghi rõ người phụ trách nếu có)
+- key_decisions (list, quyết định được chốt trong phần này)
 
+Transcript (phần {index + 1}/{total}):
+{text}
+"""
+    data = normalize_summary(complete_json(prompt, site="summary_section"))
+    SummarySection.objects(key=key).update_one(
+        set__model=SUMMARY_MODEL,
+        set__summary=data["summary"],
+        set__action_items=data["action_items"],
+        set__key_decisions=data["key_decisions"],
+        upsert=True,
+    )
     return data
+
+
+def normalize_summary(data):
+    def as_list(value):
+        if isinstance(value, list):
+            return [str(v) for v in value if v]
+        return [str(value)] if value else []
+
+    return {
+        "summary": str(data.get("summary") or ""),
+        "action_items": as_list(data.get("action_items")),
+        "key_decisions": as_list(data.get("key_decisions")),
+    }
+
+
+def _reduce(partials):
+    """Bước reduce: gộp các tóm tắt từng phần (đúng thứ tự thời gian) thành 1 kết quả."""
+    # Quá nhiều phần cho 1 prompt -> gộp theo nhóm trước (reduce nhiều tầng)
+    groups, current, current_tokens = [], [], 0
+    for partial in partials:
+        tokens = estimate_tokens(json.dumps(partial, ensure_ascii=False))
+        if current and current_tokens + tokens > Config.SUMMARY_SECTION_TOKENS:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(partial)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    # (mỗi phần đã vượt ngân sách thì gộp nhóm không giúp được, reduce luôn 1 lần)
+    if 1 < len(groups) < len(partials):
+        return _reduce([_reduce(group) for group in groups])
+
+    parts = "\n".join(
+        f"Phần {i + 1}: {json.dumps(p, ensure_ascii=False)}" for i, p in enumerate(partials)
+    )
+    prompt = f"""
+Bạn là trợ lý họp. Dưới đây là tóm tắt từng phần (theo thứ tự thời gian) của một cuộc họp.
+
+Hãy gộp lại và trả về JSON gồm:
+- summary (tóm tắt toàn bộ cuộc họp)
+- action_items (list, gộp các việc trùng nhau)
+- key_decisions (list, gộp các quyết định trùng nhau; quyết định sau thay thế quyết định trước nếu mâu thuẫn)
+
+{parts}
+"""
+    return normalize_summary(complete_json(prompt, site="summary_reduce"))
+
+
+def summarize_sections(sections):
+    """
+    Map song song (giới hạn SUMMARY_MAX_CONCURRENCY) rồi reduce.
+    Đoạn lỗi không làm mất đoạn đã xong: đoạn thành công được cache,
+    lần gọi lại chỉ tóm tắt lại các đoạn lỗi.
+    """
+    pool = eventlet.GreenPool(Config.SUMMARY_MAX_CONCURRENCY)
+    total = len(sections)
+
+    def run(args):
+        index, text = args
+        try:
+            return _summarize_section(index, total, text), None
+        except Exception as e:
+            print(f"[Summary] Section {index + 1}/{total} failed: {e}")
+            return None, e
+
+    results = list(pool.imap(run, enumerate(sections)))
+    failed = [i + 1 for i, (_, error) in enumerate(results) if error is not None]
+    if failed:
+        raise ValueError(f"Summarizing failed for sections {failed} of {total}; retry to resume")
+
+    partials = [data for data, _ in results]
+    if len(partials) == 1:
+        return partials[0]
+    return _reduce(partials)
+
+
+def summarize_transcript(transcript: str):
+    # Transcript ngắn: 1 lần gọi như cũ; dài: map-reduce theo đoạn (cắt theo lượt nói)
+    if estimate_tokens(transcript) <= Config.SUMMARY_SINGLE_PASS_TOKENS:
+        return _summarize_once(transcript)
+
+    sections = pack_units(
+        split_transcript_turns(transcript, max_tokens=Config.SUMMARY_SECTION_TOKENS),
+        max_tokens=Config.SUMMARY_SECTION_TOKENS,
+        overlap=0,
+        separator="\n",
+    )
+    return summarize_sections(sections)
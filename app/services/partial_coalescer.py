@@ -0,0 +1,75 @@
+import os
+import time
+
+from app.config import Config
+
+
+class PartialCoalescer:
+    """
+    Gom transcript tạm (partial) của 1 phiên trước khi emit ra client:
+    - Tối đa max_per_second lần/giây; partial đến trong khoảng chờ chỉ giữ bản mới nhất
+      và được emit khi hết khoảng chờ (timer của loop asyncio).
+    - mode "delta": chỉ gửi phần đuôi thay đổi so với partial đã emit trước đó
+      ({"offset", "delta"}; client ghép text = text_cũ[:offset] + delta).
+    - Final luôn emit ngay, huỷ partial đang chờ và reset trạng thái.
+    Chỉ dùng trong thread của loop asyncio.
+    """
+
+    def __init__(self, loop, emit, max_per_second=None, mode="full"):
+        self.loop = loop
+        self.emit = emit
+        rate = max_per_second or Config.PARTIALS_MAX_PER_SECOND
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.mode = mode
+        self.last_text = ""
+        self.last_emit = 0.0
+        self.pending = None
+        self.timer = None
+        self.seq = 0
+        self.counters = {"partials_in": 0, "partials_out": 0, "finals": 0}
+
+    def _payload(self, text):
+        if self.mode != "delta":
+            return {"text": text, "is_final": False}
+        offset = len(os.path.commonprefix([self.last_text, text]))
+        self.seq += 1
+        return {"offset": offset, "delta": text[offset:], "seq": self.seq, "is_final": False}
+
+    def _emit_partial(self, text):
+        self.emit(self._payload(text))
+        self.last_text = text
+        self.last_emit = time.monotonic()
+        self.counters["partials_out"] += 1
+
+    def _flush_pending(self):
+        self.timer = None
+        text, self.pending = self.pending, None
+        if text is not None and text != self.last_text:
+            self._emit_partial(text)
+
+    def partial(self, text):
+        self.counters["partials_in"] += 1
+        if text == self.last_text:
+            self.pending = None
+            return
+        wait = self.last_emit + self.interval - time.monotonic()
+        if wait <= 0 and self.timer is None:
+            self._emit_partial(text)
+            return
+        self.pending = text
+        if self.timer is None:
+            self.timer = self.loop.call_later(max(wait, 0), self._flush_pending)
+
+    def reset(self):
+        """Speechmatics đã chốt đoạn (AddTranscript): partial kế tiếp bắt đầu lại từ chuỗi rỗng."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.pending = None
+        self.last_text = ""
+
+    def final(self, payload):
+        """Emit final ngay, bỏ partial đang chờ."""
+        self.reset()
+        self.counters["finals"] += 1
+        self.emit(payload)
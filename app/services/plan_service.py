@@ -14,6 +14,7 @@ PLAN_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
         "qa_limit": 30,
         "ai_agent": 0,
         "in_meeting_ai": 0,
+        "vad": 1,
     },
     "plus": {
         "meeting_limit": 50,
@@ -23,6 +24,7 @@ PLAN_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
         "qa_limit": 500,
         "ai_agent": 1,
         "in_meeting_ai": 0,
+        "vad": 1,
     },
     "premium": {
         "meeting_limit": None,
@@ -32,6 +34,7 @@ PLAN_LIMITS: Dict[str, Dict[str, Optional[int]]] = {
         "qa_limit": None,
         "ai_agent": 1,
         "in_meeting_ai": 1,
+        "vad": 0,
     },
 }
 
@@ -0,0 +1,38 @@
+import numpy as np
+
+# Số dòng int8 được giải nén sang float32 mỗi lần khi chấm điểm (giới hạn bộ nhớ tạm)
+SCORE_BLOCK_ROWS = 4096
+
+
+def quantize_int8(matrix):
+    """
+    Lượng tử hoá vô hướng đối xứng theo từng dòng: x ≈ codes * scale.
+    Trả về (codes int8 [n, d], scales float32 [n]).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.size == 0:
+        return np.empty(matrix.shape, dtype=np.int8), np.empty(matrix.shape[0], dtype=np.float32)
+
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(matrix / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def int8_scores(codes, scales, query, block_rows=SCORE_BLOCK_ROWS):
+    """Điểm xấp xỉ codes @ query (query float32) theo từng block để không giải nén cả ma trận."""
+    query = np.asarray(query, dtype=np.float32)
+    scores = np.empty(codes.shape[0], dtype=np.float32)
+    for start in range(0, codes.shape[0], block_rows):
+        end = start + block_rows
+        scores[start:end] = (codes[start:end].astype(np.float32) @ query) * scales[start:end]
+    return scores
+
+
+def top_k_indexes(scores, k):
+    """Index của k điểm cao nhất, đã sắp xếp giảm dần."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
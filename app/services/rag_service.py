@@ -1,109 +1,121 @@
-import numpy as np
-from openai import OpenAI
+import time
+
+import eventlet
+
 from ..config import Config
 from ..models.chunk_model import Chunk
+from ..models.meeting_model import Meeting
+from . import vector_index
+from .embedding_codec import chunk_fields
+from .embedding_service import embed_texts
+from .chunking_service import chunk_transcript
+from .job_service import register_job_handler
+from .meeting_service import apply_speaker_names
+from .retrieval_service import search_chunks
 
-# Khởi tạo client OpenAI
-client = OpenAI(api_key=Config.OPENAI_API_KEY)
-
-def ingest_meeting_transcript(sid, user_id, full_transcript):
+def ingest_meeting_transcript(sid, user_id, full_transcript, progress=None):
     """
     1. Chia nhỏ transcript thành các đoạn (chunk).
     2. Gọi API Embedding của OpenAI.
     3. Lưu vào bảng Chunks (Map folder_id = sid để biết thuộc meeting nào).
+    Lỗi được raise ra ngoài để job ingest retry; chạy lại sẽ thay thế chunk cũ.
     """
     if not full_transcript:
-        return
+        return 0
 
-    # 1. Chunking đơn giản: Tách theo dòng newline
-    # Bạn có thể nâng cấp thuật toán tách câu phức tạp hơn nếu cần
-    text_chunks = full_transcript.split('\n')
-    # Lọc bỏ dòng quá ngắn
-    text_chunks = [t.strip() for t in text_chunks if len(t.strip()) > 20]
+    # 1. Chunking: gộp các lượt nói theo ngân sách token, bỏ chunk trùng
+    text_chunks = chunk_transcript(full_transcript)
 
     if not text_chunks:
-        return
+        return 0
+
+    # 2. Lấy Embedding (chia batch theo token, chạy song song)
+    embeddings = embed_texts(text_chunks, progress=progress)
 
-    try:
-        # 2. Lấy Embedding (Batch request để tối ưu)
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text_chunks
+    # 3. Lưu vào DB
+    # Lưu ý: Ở đây ta dùng folder_id để lưu sid của cuộc họp.
+    # file_id ta set là 'meeting_transcript' để phân biệt với file notebook.
+    chunks_to_create = []
+    for i, text in enumerate(text_chunks):
+        chunk = Chunk(
+            user_id=user_id,
+            folder_id=sid,        # Gom nhóm theo cuộc họp
+            file_id='meeting',    # Đánh dấu nguồn là meeting
+            chunk_index=i,
+            text=text,
+            **chunk_fields(embeddings[i])
         )
-        
-        embeddings = [item.embedding for item in response.data]
-
-        # 3. Lưu vào DB
-        # Lưu ý: Ở đây ta dùng folder_id để lưu sid của cuộc họp.
-        # file_id ta set là 'meeting_transcript' để phân biệt với file notebook.
-        chunks_to_create = []
-        for i, text in enumerate(text_chunks):
-            chunk = Chunk(
-                user_id=user_id,
-                folder_id=sid,        # Gom nhóm theo cuộc họp
-                file_id='meeting',    # Đánh dấu nguồn là meeting
-                chunk_index=i,
-                text=text,
-                embedding=embeddings[i]
-            )
-            chunks_to_create.append(chunk)
-        
-        # Bulk insert
-        Chunk.objects.insert(chunks_to_create)
-        print(f"[RAG] Ingested {len(chunks_to_create)} chunks for meeting {sid}")
-
-    except Exception as e:
-        print(f"[RAG] Error ingesting meeting: {e}")
-
-def retrieve_relevant_chunks(user_id, query, top_k=3, folder_id=None, file_id=None, max_candidates=200):
+        chunks_to_create.append(chunk)
+
+    # Thay thế chunk cũ (nếu job chạy lại) rồi bulk insert
+    Chunk.objects(folder_id=sid, file_id='meeting').delete()
+    vector_index.invalidate(folder_id=sid)
+    inserted = Chunk.objects.insert(chunks_to_create)
+    vector_index.add_chunks(inserted)
+    print(f"[RAG] Ingested {len(chunks_to_create)} chunks for meeting {sid}")
+    return len(chunks_to_create)
+
+
+def relabel_live_chunks(sid, speaker_names, user_id=None):
+    """
+    Chunk tạo trong lúc họp đã có embedding, chỉ cần đổi nhãn người nói
+    (Người X -> tên thật) trong text, không phải embed lại.
+    """
+    chunks = Chunk.objects(folder_id=sid, file_id='meeting').only('id', 'text')
+    total = 0
+    changed = False
+    for chunk in chunks:
+        total += 1
+        text = apply_speaker_names(chunk.text, speaker_names)
+        if text != chunk.text:
+            chunk.update(set__text=text)
+            changed = True
+    # BM25 đã cache vẫn giữ nhãn "Người N" -> bỏ index để build lại với tên thật
+    if changed:
+        vector_index.invalidate(user_id=user_id, folder_id=sid)
+    return total
+
+
+@register_job_handler("meeting")
+def _run_meeting_job(job, report):
+    sid = job.payload.get("sid")
+    meeting = Meeting.objects(sid=sid).first()
+    if not meeting or not meeting.full_transcript:
+        return {"total_chunks": 0, "skipped": "no transcript"}
+
+    # Phiên stream còn flush chunk live (flush cuối chạy sau khi materialize transcript) -> chờ
+    deadline = time.time() + Config.LIVE_INDEX_CLOSE_WAIT_SECONDS
+    while meeting.live_index_open and time.time() < deadline:
+        eventlet.sleep(1)
+        meeting.reload()
+
+    # Chunk live chỉ dùng được khi đã phủ hết transcript (flush cuối lỗi -> thiếu phần cuối)
+    lines = [line for line in meeting.full_transcript.splitlines() if line.strip()]
+    if meeting.live_indexed and (meeting.live_indexed_lines or 0) >= len(lines):
+        return {"total_chunks": relabel_live_chunks(sid, meeting.speaker_names, meeting.user_id), "skipped": "live indexed"}
+
+    # Đóng index live trước khi thay chunk, để phiên còn treo không append thêm chunk trùng
+    Meeting.objects(sid=sid).update_one(set__live_index_open=False)
+    transcript = apply_speaker_names(meeting.full_transcript, meeting.speaker_names)
+    total = ingest_meeting_transcript(
+        sid,
+        job.user_id,
+        transcript,
+        progress=lambda done, n: report(done / n if n else 1.0),
+    )
+    return {"total_chunks": total}
+
+def retrieve_relevant_chunks(user_id, query, top_k=3, folder_id=None, file_id=None, batch_size=512):
     """
     Tìm các đoạn văn bản (chunks) liên quan nhất đến câu hỏi của user.
-    Hiện tại search trên toàn bộ chunks của user (gồm cả meeting và notebook).
+    Có folder_id (meeting / notebook): hybrid BM25 + vector (xem retrieval_service).
+    Không có folder_id: search trên toàn bộ chunks của user (gồm cả meeting và notebook).
     """
-    # 1. Embed câu hỏi
-    try:
-        query_response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=[query]
-        )
-        query_vector = query_response.data[0].embedding
-    except Exception as e:
-        print(f"[RAG] Error embedding query: {e}")
-        return []
-
-    # 2. Lấy tất cả chunks của user (nếu data ít)
-    # Nếu data nhiều, bạn nên dùng Vector Database như Pinecone/Qdrant thay vì tính toán tay
-    query_set = Chunk.objects(user_id=user_id)
-    if folder_id:
-        query_set = query_set.filter(folder_id=folder_id)
-    if file_id:
-        query_set = query_set.filter(file_id=file_id)
-
-    all_chunks = query_set.limit(max_candidates)
-    
-    scored_chunks = []
-    
-    for chunk in all_chunks:
-        if not chunk.embedding:
-            continue
-        
-        # Tính Cosine Similarity
-        vec_a = np.array(query_vector)
-        vec_b = np.array(chunk.embedding)
-        
-        dot_product = np.dot(vec_a, vec_b)
-        norm_a = np.linalg.norm(vec_a)
-        norm_b = np.linalg.norm(vec_b)
-        
-        if norm_a == 0 or norm_b == 0: continue
-            
-        cosine_sim = dot_product / (norm_a * norm_b)
-        
-        scored_chunks.append({
-            "chunk": chunk,
-            "score": cosine_sim
-        })
-    
-    # 3. Sắp xếp theo điểm số giảm dần và lấy top K
-    sorted_chunks = sorted(scored_chunks, key=lambda x: x['score'], reverse=True)
-    return [item['chunk'] for item in sorted_chunks[:top_k]]
\ No newline at end of file
+    return search_chunks(
+        user_id,
+        query,
+        folder_id=folder_id,
+        file_ids=[file_id] if file_id else None,
+        top_k=top_k,
+        batch_size=batch_size,
+    )
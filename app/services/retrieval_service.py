@@ -0,0 +1,55 @@
+from ..config import Config
+from ..models.chunk_model import Chunk
+from . import vector_index
+from .embedding_service import embed_text
+from .lexical_index import is_keyword_query
+
+
+def reciprocal_rank_fusion(rankings, k=60, top_k=5):
+    """Gộp nhiều danh sách (chunk_id, score) theo RRF: sum 1 / (k + rank)."""
+    fused = {}
+    for ranking in rankings:
+        for rank, (chunk_id, _) in enumerate(ranking, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+
+def search_chunks(user_id, query, folder_id=None, file_ids=None, top_k=5, batch_size=512):
+    """
+    Tìm chunk liên quan cho câu hỏi, trả về list Chunk (không kèm embedding).
+
+    - Có folder_id: hybrid BM25 (inverted index) + vector, gộp bằng RRF.
+      Câu hỏi dạng từ khoá mà BM25 đã khớp đủ mọi term thì bỏ qua bước embed.
+    - Không có folder_id: quét vector toàn bộ chunk của user theo batch.
+    """
+    if not query or top_k <= 0:
+        return []
+
+    if not folder_id:
+        try:
+            query_vector = embed_text(query)
+        except Exception as e:
+            print(f"[RAG] Error embedding query: {e}")
+            return []
+        query_set = Chunk.objects(user_id=user_id)
+        if file_ids:
+            query_set = query_set.filter(file_id__in=list(file_ids))
+        scored_ids = vector_index.stream_top_k(query_set, query_vector, top_k=top_k, batch_size=batch_size)
+        return vector_index.fetch_chunks(scored_ids)
+
+    index = vector_index.get_index(user_id, folder_id)
+    depth = max(top_k, top_k * Config.HYBRID_CANDIDATE_FACTOR)
+
+    lexical_ids, coverage = index.get_lexical().search(query, top_k=depth, file_ids=file_ids)
+    if lexical_ids and coverage >= 1.0 and is_keyword_query(query):
+        return vector_index.fetch_chunks(lexical_ids[:top_k])
+
+    try:
+        query_vector = embed_text(query)
+    except Exception as e:
+        print(f"[RAG] Error embedding query, using lexical results only: {e}")
+        return vector_index.fetch_chunks(lexical_ids[:top_k])
+
+    vector_ids = index.search(query_vector, top_k=depth, file_ids=file_ids)
+    fused = reciprocal_rank_fusion([vector_ids, lexical_ids], k=Config.HYBRID_RRF_K, top_k=top_k)
+    return vector_index.fetch_chunks(fused)
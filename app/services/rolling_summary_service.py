@@ -0,0 +1,101 @@
+import json
+import threading
+
+from app.config import Config
+from app.models.meeting_model import Meeting
+from app.services.embedding_service import estimate_tokens
+from app.services.meeting_service import apply_speaker_names
+from app.services.openai_service import complete_json, normalize_summary
+
+EMPTY_SUMMARY = {"summary": "", "action_items": [], "key_decisions": []}
+
+
+def fold_block(state, lines):
+    """Gộp 1 khối câu mới vào trạng thái tóm tắt hiện tại (1 lần gọi LLM, prompt nhỏ)."""
+    block = "\n".join(lines)
+    prompt = f"""
+Bạn là trợ lý họp, đang cập nhật bản tóm tắt của một cuộc họp đang diễn ra.
+
+Tóm tắt hiện tại (JSON):
+{json.dumps(state or EMPTY_SUMMARY, ensure_ascii=False)}
+
+Đoạn transcript mới:
+{block}
+
+Hãy trả về JSON đã cập nhật gồm:
+- summary (tóm tắt toàn bộ cuộc họp tới thời điểm này)
+- action_items (list, giữ việc cũ, thêm việc mới, gộp việc trùng)
+- key_decisions (list, quyết định sau thay thế quyết định trước nếu mâu thuẫn)
+"""
+    return normalize_summary(complete_json(prompt, site="rolling_summary"))
+
+
+class RollingSummarizer:
+    """
+    Tóm tắt cuốn chiếu trong lúc họp (gói có in_meeting_ai).
+    Câu đã chốt được gom lại; đủ ROLLING_SUMMARY_MIN_TOKENS thì gộp vào trạng thái tóm tắt
+    và lưu vào Meeting.live_summary cùng số câu đã gộp (live_summary_lines).
+    """
+
+    def __init__(self, sid):
+        self.sid = sid
+        self.pending = []
+        self.state = None
+        self.folded_lines = 0
+        self.lock = threading.Lock()
+        self.fold_lock = threading.Lock()
+
+    def add_line(self, line):
+        line = (line or "").strip()
+        if line:
+            with self.lock:
+                self.pending.append(line)
+
+    def fold(self, force=False):
+        """
+        Gộp các câu đang chờ (force=True: gộp cả khi ít câu, dùng khi kết thúc họp).
+        Trả về trạng thái mới, hoặc None nếu chưa cần gộp. Blocking, chạy trong executor.
+        """
+        with self.fold_lock:
+            with self.lock:
+                lines = list(self.pending)
+            if not lines:
+                return None
+            if not force and estimate_tokens("\n".join(lines)) < Config.ROLLING_SUMMARY_MIN_TOKENS:
+                return None
+
+            meeting = Meeting.objects(sid=self.sid).only("speaker_names").first()
+            names = meeting.speaker_names if meeting else None
+            block = [apply_speaker_names(line, names) for line in lines]
+            try:
+                state = fold_block(self.state, block)
+            except Exception as e:
+                # Giữ câu trong hàng đợi, lần sau gộp tiếp
+                print(f"[RollingSummary] Fold failed for {self.sid}: {e}")
+                return None
+
+            with self.lock:
+                self.pending = self.pending[len(lines):]
+            self.state = state
+            self.folded_lines += len(lines)
+            Meeting.objects(sid=self.sid).update_one(
+                set__live_summary=state,
+                set__live_summary_lines=self.folded_lines,
+            )
+            return state
+
+
+def finalize_rolling_summary(meeting, transcript):
+    """
+    Kết quả tóm tắt cuối từ bản cuốn chiếu: chỉ gộp thêm các câu chưa kịp gộp
+    (thường 0 hoặc vài câu). Trả về None nếu cuộc họp không có bản cuốn chiếu.
+    """
+    state = meeting.live_summary
+    if not state:
+        return None
+
+    lines = [line for line in (transcript or "").splitlines() if line.strip()]
+    remaining = lines[meeting.live_summary_lines or 0:]
+    if not remaining:
+        return normalize_summary(state)
+    return fold_block(state, remaining)
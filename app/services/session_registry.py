@@ -0,0 +1,240 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import socket
+import socketserver
+import threading
+import time
+
+from app.config import Config
+
+
+def worker_id():
+    """Định danh worker hiện tại (host:pid), dùng làm owner của phiên. Tính lại sau fork."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class _SessionTable:
+    """Bảng sid -> {owner, data, expires_at} có TTL; dùng chung cho backend in-memory và broker."""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, entry, now):
+        return entry is not None and entry["expires_at"] > now
+
+    def claim(self, sid, owner, data, ttl):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(sid)
+            if self._alive(entry, now) and entry["owner"] != owner:
+                return False
+            self.entries[sid] = {"owner": owner, "data": dict(data or {}), "expires_at": now + ttl}
+            return True
+
+    def update(self, sid, owner, data, ttl):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(sid)
+            if entry is None or entry["owner"] != owner:
+                return False
+            entry["data"].update(data or {})
+            entry["expires_at"] = now + ttl
+            return True
+
+    def release(self, sid, owner):
+        with self.lock:
+            entry = self.entries.get(sid)
+            if entry is not None and entry["owner"] == owner:
+                del self.entries[sid]
+                return True
+            return False
+
+    def get(self, sid):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(sid)
+            if not self._alive(entry, now):
+                return None
+            return {"sid": sid, "owner": entry["owner"], **entry["data"]}
+
+    def list(self):
+        now = time.time()
+        with self.lock:
+            # Dọn luôn entry hết hạn (worker chết không kịp release)
+            for sid in [s for s, e in self.entries.items() if not self._alive(e, now)]:
+                del self.entries[sid]
+            return [{"sid": sid, "owner": e["owner"], **e["data"]} for sid, e in self.entries.items()]
+
+
+class SessionRegistry(ABC):
+    """
+    Registry các phiên stream đang chạy. Mỗi phiên thuộc 1 worker (owner); owner gia hạn
+    định kỳ (update), worker chết thì entry tự hết hạn sau ttl.
+    """
+
+    @abstractmethod
+    def claim(self, sid, data=None):
+        ...
+
+    @abstractmethod
+    def update(self, sid, data=None):
+        ...
+
+    @abstractmethod
+    def release(self, sid):
+        ...
+
+    @abstractmethod
+    def get(self, sid):
+        ...
+
+    @abstractmethod
+    def list(self):
+        ...
+
+
+class InMemorySessionRegistry(SessionRegistry):
+    """Backend mặc định: chỉ thấy phiên của process hiện tại."""
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or Config.SESSION_REGISTRY_TTL
+        self.table = _SessionTable()
+
+    def claim(self, sid, data=None):
+        return self.table.claim(sid, worker_id(), data, self.ttl)
+
+    def update(self, sid, data=None):
+        return self.table.update(sid, worker_id(), data, self.ttl)
+
+    def release(self, sid):
+        return self.table.release(sid, worker_id())
+
+    def get(self, sid):
+        return self.table.get(sid)
+
+    def list(self):
+        return self.table.list()
+
+
+class BrokerSessionRegistry(SessionRegistry):
+    """
+    Backend nhiều process: gọi broker qua Unix socket (mỗi request 1 dòng JSON).
+    Broker không truy cập được thì log và coi như thành công, để cuộc họp vẫn chạy.
+    """
+
+    def __init__(self, path, ttl=None):
+        self.path = path
+        self.ttl = ttl or Config.SESSION_REGISTRY_TTL
+        self.sock = None
+        self.reader = None
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(Config.SESSION_REGISTRY_TIMEOUT)
+        sock.connect(self.path)
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+
+    def _disconnect(self):
+        for closable in (self.reader, self.sock):
+            try:
+                if closable is not None:
+                    closable.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.reader = None
+
+    def _request(self, op, default=None, **params):
+        payload = (json.dumps({"op": op, "owner": worker_id(), "ttl": self.ttl, **params}) + "\n").encode()
+        with self.lock:
+            # Thử lại 1 lần nếu kết nối cũ đã đứt (broker khởi động lại)
+            for attempt in range(2):
+                try:
+                    if self.sock is None:
+                        self._connect()
+                    self.sock.sendall(payload)
+                    line = self.reader.readline()
+                    if not line:
+                        raise ConnectionError("broker closed connection")
+                    return json.loads(line).get("value")
+                except (OSError, ValueError) as e:
+                    self._disconnect()
+                    if attempt:
+                        print(f"[SessionRegistry] Broker request '{op}' failed: {e}")
+        return default
+
+    def claim(self, sid, data=None):
+        return self._request("claim", default=True, sid=sid, data=data)
+
+    def update(self, sid, data=None):
+        return self._request("update", default=True, sid=sid, data=data)
+
+    def release(self, sid):
+        return self._request("release", default=False, sid=sid)
+
+    def get(self, sid):
+        return self._request("get", sid=sid)
+
+    def list(self):
+        return self._request("list", default=[])
+
+
+class _BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        table = self.server.table
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+                op = req.get("op")
+                if op == "claim":
+                    value = table.claim(req["sid"], req["owner"], req.get("data"), req["ttl"])
+                elif op == "update":
+                    value = table.update(req["sid"], req["owner"], req.get("data"), req["ttl"])
+                elif op == "release":
+                    value = table.release(req["sid"], req["owner"])
+                elif op == "get":
+                    value = table.get(req["sid"])
+                elif op == "list":
+                    value = table.list()
+                else:
+                    raise ValueError(f"unknown op {op}")
+                response = {"ok": True, "value": value}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+class _BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def run_broker(path):
+    """Chạy broker registry trên Unix socket `path` (blocking)."""
+    if os.path.exists(path):
+        os.unlink(path)
+    server = _BrokerServer(path, _BrokerHandler)
+    server.table = _SessionTable()
+    print(f"[SessionRegistry] Broker listening on {path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def create_registry(url=None):
+    """Tạo registry theo URL: "memory" (mặc định) hoặc "unix:///đường/dẫn.sock"."""
+    url = url or Config.SESSION_REGISTRY_URL
+    if url.startswith("unix://"):
+        return BrokerSessionRegistry(url[len("unix://"):])
+    if url != "memory":
+        raise ValueError(f"Unsupported session registry: {url}")
+    return InMemorySessionRegistry()
+
+
+registry = create_registry()
@@ -0,0 +1,134 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import eventlet
+from eventlet.event import Event
+from mongoengine.errors import NotUniqueError
+
+from app.config import Config
+from app.models.lease_model import Lease
+from app.services.session_registry import worker_id
+
+
+def acquire_lease(key, seconds):
+    """Lấy lease nếu chưa ai giữ hoặc lease cũ đã hết hạn. Trả về True nếu lấy được."""
+    now = datetime.utcnow()
+    try:
+        # Lease còn hạn -> filter không khớp, upsert trùng _id -> NotUniqueError
+        Lease.objects(key=key, expires_at__lte=now).update_one(
+            set__owner=worker_id(),
+            set__acquired_at=now,
+            set__expires_at=now + timedelta(seconds=seconds),
+            upsert=True,
+        )
+        return True
+    except NotUniqueError:
+        return False
+
+
+def renew_lease(key, seconds):
+    return bool(Lease.objects(key=key, owner=worker_id()).update_one(
+        set__expires_at=datetime.utcnow() + timedelta(seconds=seconds),
+    ))
+
+
+def release_lease(key):
+    Lease.objects(key=key, owner=worker_id()).delete()
+
+
+class _Call:
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Gộp các lần tính trùng key: trong process, request đến sau chờ kết quả của lần đang chạy;
+    giữa các process, chỉ process giữ lease (Mongo) được tính, process khác poll `ready()`
+    tới khi có kết quả hoặc lease được nhả (leader lỗi) thì tự tính.
+    """
+
+    def __init__(self, namespace, lease_seconds=None):
+        self.namespace = namespace
+        self.lease_seconds = lease_seconds or Config.SINGLE_FLIGHT_LEASE_SECONDS
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.counters = {"computed": 0, "shared_local": 0, "shared_remote": 0, "failed": 0}
+
+    def do(self, key, fn, ready=None):
+        """
+        Chạy fn() 1 lần cho mỗi key đang bay. Trả về (result, shared):
+        shared=True nghĩa là kết quả do request/process khác tính.
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            self.counters["shared_local"] += 1
+            return call.result, True
+
+        try:
+            result, shared = self._run_leased(key, fn, ready)
+            call.result = result
+            return result, shared
+        except Exception as e:
+            call.error = e
+            self.counters["failed"] += 1
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.send()
+
+    def _run_leased(self, key, fn, ready):
+        lease_key = f"{self.namespace}:{key}"
+        deadline = time.time() + Config.SINGLE_FLIGHT_WAIT_SECONDS
+        while not acquire_lease(lease_key, self.lease_seconds):
+            # Process khác đang tính -> chờ kết quả của nó
+            result = ready() if ready else None
+            if result is not None:
+                self.counters["shared_remote"] += 1
+                return result, True
+            if time.time() >= deadline:
+                raise TimeoutError(f"Timed out waiting for in-flight '{lease_key}'")
+            eventlet.sleep(Config.SINGLE_FLIGHT_POLL_SECONDS)
+
+        heartbeat = eventlet.spawn(self._heartbeat, lease_key)
+        try:
+            # Có thể process khác vừa xong ngay trước khi ta lấy được lease
+            result = ready() if ready else None
+            if result is not None:
+                self.counters["shared_remote"] += 1
+                return result, True
+            result = fn()
+            self.counters["computed"] += 1
+            return result, False
+        finally:
+            heartbeat.kill()
+            try:
+                release_lease(lease_key)
+            except Exception as e:
+                print(f"[SingleFlight] Release lease {lease_key} failed: {e}")
+
+    def _heartbeat(self, lease_key):
+        # Gia hạn lease khi tính lâu (map-reduce transcript dài)
+        while True:
+            eventlet.sleep(self.lease_seconds / 3)
+            try:
+                renew_lease(lease_key, self.lease_seconds)
+            except Exception as e:
+                print(f"[SingleFlight] Renew lease {lease_key} failed: {e}")
+
+    def stats(self):
+        with self.lock:
+            in_flight = len(self.calls)
+        return {"namespace": self.namespace, "in_flight": in_flight, **self.counters}
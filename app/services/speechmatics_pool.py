@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+import websockets
+
+from app.config import Config
+from app.services import metrics_service
+
+
+def recognition_config(language="vi"):
+    return {
+        "message": "StartRecognition",
+        "audio_format": {
+            "type": "raw",
+            "encoding": "pcm_s16le",
+            "sample_rate": 16000
+        },
+        "transcription_config": {
+            "language": language,
+            "enable_partials": True,
+            "max_delay": 3,
+            "diarization": "speaker"
+        }
+    }
+
+
+async def open_session(language="vi"):
+    """Mở websocket + StartRecognition, chờ RecognitionStarted rồi trả về ws sẵn sàng nhận audio."""
+    headers = {"Authorization": f"Bearer {Config.SPEECHMATICS_API_KEY}"}
+    ws = await websockets.connect(Config.SM_URL, extra_headers=headers)
+    try:
+        await ws.send(json.dumps(recognition_config(language)))
+        while True:
+            msg = json.loads(await asyncio.wait_for(ws.recv(), Config.SM_HANDSHAKE_TIMEOUT))
+            msg_type = msg.get("message")
+            if msg_type == "RecognitionStarted":
+                return ws
+            if msg_type == "Error":
+                raise RuntimeError(f"Speechmatics error: {msg.get('type')} {msg.get('reason')}")
+    except BaseException:
+        await ws.close()
+        raise
+
+
+class SpeechmaticsPool:
+    """
+    Pool các phiên Speechmatics đã bắt tay xong (TLS + StartRecognition) cho từng ngôn ngữ,
+    để start_streaming lấy ra dùng ngay. Phiên để quá max_idle giây bị đóng và thay mới;
+    pool được bù đầy trong nền. Chỉ chạy trong loop của TranscriptionGateway.
+    """
+
+    def __init__(self, size=None, max_idle=None, languages=None):
+        self.size = Config.SM_POOL_SIZE if size is None else size
+        self.max_idle = max_idle or Config.SM_POOL_MAX_IDLE_SECONDS
+        self.languages = languages or Config.SM_POOL_LANGUAGES
+        self.idle = {language: deque() for language in self.languages}  # (ws, opened_at)
+        self.opening = {language: 0 for language in self.languages}
+        self.wakeup = None
+        self.task = None
+        self.failing = False
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "open_failures": 0}
+
+    def start(self, loop):
+        if self.size <= 0 or not Config.SPEECHMATICS_API_KEY or self.task is not None:
+            return
+        self.wakeup = asyncio.Event()
+        self.task = loop.create_task(self._maintain())
+
+    async def acquire(self, language="vi"):
+        """Lấy 1 phiên sẵn sàng; pool rỗng thì mở mới (cold start)."""
+        started = time.monotonic()
+        idle = self.idle.get(language)
+        while idle:
+            ws, opened_at = idle.popleft()
+            if not ws.closed and time.monotonic() - opened_at < self.max_idle:
+                self.counters["hits"] += 1
+                metrics_service.increment("sm_pool_hits")
+                self._refill_soon()
+                return ws
+            await self._close(ws)
+
+        self.counters["misses"] += 1
+        metrics_service.increment("sm_pool_misses")
+        self._refill_soon()
+        ws = await open_session(language)
+        metrics_service.record("sm_cold_open_ms", (time.monotonic() - started) * 1000)
+        return ws
+
+    def _refill_soon(self):
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def _close(self, ws):
+        try:
+            await ws.close()
+        except Exception:
+            pass
+
+    async def _open_into(self, language):
+        self.opening[language] += 1
+        started = time.monotonic()
+        try:
+            ws = await open_session(language)
+            self.idle[language].append((ws, time.monotonic()))
+            self.failing = False
+            metrics_service.record("sm_warm_open_ms", (time.monotonic() - started) * 1000)
+        except Exception as e:
+            self.counters["open_failures"] += 1
+            self.failing = True
+            print(f"[SMPool] Pre-warm failed ({language}): {e}")
+        finally:
+            self.opening[language] -= 1
+
+    async def _maintain(self):
+        while True:
+            now = time.monotonic()
+            for language, idle in self.idle.items():
+                # Đóng phiên để quá lâu (Speechmatics có thể tự ngắt phiên không có audio)
+                fresh = deque()
+                while idle:
+                    ws, opened_at = idle.popleft()
+                    if ws.closed or now - opened_at >= self.max_idle:
+                        self.counters["expired"] += 1
+                        await self._close(ws)
+                    else:
+                        fresh.append((ws, opened_at))
+                idle.extend(fresh)
+
+                missing = self.size - len(idle) - self.opening[language]
+                for _ in range(max(missing, 0)):
+                    asyncio.ensure_future(self._open_into(language))
+
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), Config.SM_POOL_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            if self.failing:
+                # Lỗi liên tục (mạng/API key): giãn nhịp để không dội request
+                await asyncio.sleep(Config.SM_POOL_CHECK_SECONDS)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "max_idle_seconds": self.max_idle,
+            "idle": {language: len(idle) for language, idle in self.idle.items()},
+            "opening": dict(self.opening),
+            **self.counters,
+        }
+
+
+pool = SpeechmaticsPool()
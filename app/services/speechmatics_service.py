@@ -1,42 +1,71 @@
-import asyncio, json, queue, websockets
-from app.extensions import socketio
+import asyncio, json, time
 from app.config import Config
-from app.services.meeting_service import append_transcript
+from app.services import metrics_service
+from app.services.live_index_service import LiveMeetingIndexer
+from app.services.partial_coalescer import PartialCoalescer
+from app.services.rolling_summary_service import RollingSummarizer
+from app.services.speechmatics_pool import pool
+from app.services.transcript_service import SegmentBuffer, format_line, materialize_transcript
 
 # XÓA: sessions = {}, session_transcripts = {} 
 # (Giữ lại session_dict nếu cần quản lý queue worker riêng biệt, 
 # nhưng ở đây ta chỉ cần lưu DB nên bỏ bớt cho sạch)
 
-def run_sm_worker(sid, audio_queue, emit_queue):
-    try:
-        asyncio.run(sm_worker(sid, audio_queue, emit_queue))
-    finally:
+async def sm_worker(sid, audio_queue, emit_queue, user_id=None, vad=None, partial_mode="full", live_summary=False):
+    """
+    1 phiên Speechmatics, chạy trên loop asyncio dùng chung của TranscriptionGateway.
+    audio_queue là asyncio.Queue (None = kết thúc). Mọi thao tác blocking (DB,
+    embedding) phải chạy qua executor để không chặn các phiên khác.
+    vad: nếu audio đã được VAD lọc im lặng, timestamp được đổi về thời gian thật.
+    partial_mode: "full" (gửi cả câu tạm) hoặc "delta" (chỉ gửi phần đuôi thay đổi).
+    live_summary: tóm tắt cuốn chiếu, đẩy "summary_update" về room của sid.
+    """
+    started = time.monotonic()
+    first_transcript = True
+    final_buffer = ""
+    segment_start = None
+    loop = asyncio.get_running_loop()
+    indexer = LiveMeetingIndexer(sid, user_id) if Config.LIVE_INDEX_ENABLED and user_id else None
+    segments = await loop.run_in_executor(None, SegmentBuffer, sid)
+    summarizer = RollingSummarizer(sid) if live_summary else None
+    source_time = vad.to_source_time if vad is not None else (lambda t: t)
+
+    def emit_transcript(data):
+        nonlocal first_transcript
+        if first_transcript:
+            first_transcript = False
+            metrics_service.record("time_to_first_transcript_ms", (time.monotonic() - started) * 1000)
         if emit_queue is not None:
-            emit_queue.put(None)
+            emit_queue.put({"event": "transcript_response", "data": data})
 
+    partials = PartialCoalescer(loop, emit_transcript, mode=partial_mode)
 
-async def sm_worker(sid, audio_queue, emit_queue):
-    headers = {"Authorization": f"Bearer {Config.SPEECHMATICS_API_KEY}"}
-    final_buffer = ""
+    async def fold_summary(final=False):
+        try:
+            state = await loop.run_in_executor(None, summarizer.fold, final)
+        except Exception as e:
+            print(f"[RollingSummary] Fold failed for {sid}: {e}")
+            return
+        if state is not None and emit_queue is not None:
+            emit_queue.put({"event": "summary_update", "data": {**state, "is_final": final}})
 
-    async with websockets.connect(Config.SM_URL, extra_headers=headers) as ws:
-        await ws.send(json.dumps({
-            "message": "StartRecognition",
-            "audio_format": {
-                "type": "raw",
-                "encoding": "pcm_s16le",
-                "sample_rate": 16000
-            },
-            "transcription_config": {
-                "language": "vi",
-                "enable_partials": True,
-                "max_delay": 3,
-                "diarization": "speaker"
-            }
-        }))
+    async def flush_segments(retries=0):
+        for attempt in range(retries + 1):
+            try:
+                await loop.run_in_executor(None, segments.flush)
+                return True
+            except Exception as e:
+                print(f"[Transcript] Flush failed for {sid} (attempt {attempt + 1}): {e}")
+            if attempt < retries:
+                await asyncio.sleep(Config.TRANSCRIPT_FLUSH_MS / 1000 * (attempt + 1))
+        return False
 
+    # Lấy phiên đã bắt tay sẵn từ pool (hoặc mở mới nếu pool rỗng)
+    ws = await pool.acquire("vi")
+    metrics_service.record("sm_acquire_ms", (time.monotonic() - started) * 1000)
+    try:
         async def receive_loop():
-            nonlocal final_buffer
+            nonlocal final_buffer, segment_start
             async for raw in ws:
                 msg = json.loads(raw)
                 msg_type = msg.get("message")
@@ -44,21 +73,20 @@ async def sm_worker(sid, audio_queue, emit_queue):
                 if msg_type == "AddPartialTranscript":
                     text = msg.get("metadata", {}).get("transcript", "").strip()
                     if text:
-                        if emit_queue is not None:
-                            emit_queue.put({
-                                "event": "transcript_response",
-                                "data": {"text": text, "is_final": False},
-                            })
+                        partials.partial(text)
 
                 elif msg_type == "AddTranscript":
                     text = msg.get("metadata", {}).get("transcript", "").strip()
                     results = msg.get("results", [])
+                    partials.reset()
 
                     speaker = "Unknown"
                     if results and results[0].get("alternatives"):
                         speaker = results[0]["alternatives"][0].get("speaker", "Unknown")
 
                     if text:
+                        if not final_buffer and results:
+                            segment_start = results[0].get("start_time")
                         final_buffer += (" " if final_buffer else "") + text
 
                     for r in results:
@@ -66,30 +94,86 @@ async def sm_worker(sid, audio_queue, emit_queue):
                             sentence = final_buffer.strip()
                             final_buffer = ""
                             if sentence:
-                                line = f"Người {speaker}: {sentence}"
+                                line = format_line(speaker, sentence)
                                 
-                                # Gửi UI
-                                if emit_queue is not None:
-                                    emit_queue.put({
-                                        "event": "transcript_response",
-                                        "data": {
-                                            "speaker": f"Người {speaker}",
-                                            "text": sentence,
-                                            "is_final": True,
-                                        },
-                                    })
+                                # Gửi UI ngay, không qua throttle
+                                partials.final({
+                                    "speaker": f"Người {speaker}",
+                                    "text": sentence,
+                                    "is_final": True,
+                                })
                                 
-                                # LƯU VÀO DATABASE (Mới thêm)
-                                append_transcript(sid, line)
+                                # LƯU VÀO DATABASE: append segment, ghi theo batch
+                                if segments.add(speaker, sentence, source_time(segment_start), source_time(r.get("end_time"))):
+                                    await flush_segments()
+                                segment_start = None
 
+                                # Đưa vào index RAG trực tiếp
+                                if indexer is not None:
+                                    indexer.add_sentence(line)
+                                if summarizer is not None:
+                                    summarizer.add_line(line)
+
+        async def segment_loop():
+            # Flush theo thời gian khi ít người nói (chưa đủ N segment)
+            while True:
+                await asyncio.sleep(Config.TRANSCRIPT_FLUSH_MS / 1000)
+                if segments.due():
+                    await flush_segments()
+
+        async def index_loop():
+            # Micro-batch: vài giây embed 1 lần các cửa sổ câu đã đủ
+            while True:
+                await asyncio.sleep(Config.LIVE_INDEX_FLUSH_SECONDS)
+                try:
+                    await loop.run_in_executor(None, indexer.flush)
+                except Exception as e:
+                    print(f"[LiveIndex] Flush failed for {sid}: {e}")
+
+        async def summary_loop():
+            # Định kỳ gộp khối câu mới vào bản tóm tắt đang chạy
+            while True:
+                await asyncio.sleep(Config.ROLLING_SUMMARY_INTERVAL_SECONDS)
+                await fold_summary()
+
+        if indexer is not None:
+            await loop.run_in_executor(None, indexer.open)
         recv_task = asyncio.create_task(receive_loop())
+        segment_task = asyncio.create_task(segment_loop())
+        index_task = asyncio.create_task(index_loop()) if indexer is not None else None
+        summary_task = asyncio.create_task(summary_loop()) if summarizer is not None else None
 
-        loop = asyncio.get_running_loop()
-        while True:
-            chunk = await loop.run_in_executor(None, audio_queue.get)
-            if chunk is None:
-                await ws.close()
-                break
-            await ws.send(chunk)
+        try:
+            while True:
+                chunk = await audio_queue.get()
+                if chunk is None:
+                    await ws.close()
+                    break
+                await ws.send(chunk)
 
-        await recv_task
\ No newline at end of file
+            await recv_task
+        finally:
+            partials.reset()
+            print(f"[Transcript] {sid} partials: {partials.counters}")
+            segment_task.cancel()
+            # Lần flush cuối: thử lại để không mất các câu còn trong bộ đệm trước khi materialize
+            if not await flush_segments(retries=Config.TRANSCRIPT_FINAL_FLUSH_RETRIES):
+                print(f"[Transcript] {sid}: {len(segments.pending)} segments could not be saved")
+            try:
+                await loop.run_in_executor(None, materialize_transcript, sid)
+            except Exception as e:
+                print(f"[Transcript] Materialize failed for {sid}: {e}")
+            if index_task is not None:
+                index_task.cancel()
+                try:
+                    await loop.run_in_executor(None, indexer.flush, True)
+                except Exception as e:
+                    print(f"[LiveIndex] Final flush failed for {sid}: {e}")
+                finally:
+                    # Báo job ingest là chunk live đã đầy đủ (hoặc không thể bổ sung thêm)
+                    await loop.run_in_executor(None, indexer.close)
+            if summary_task is not None:
+                summary_task.cancel()
+                await fold_summary(final=True)
+    finally:
+        await ws.close()
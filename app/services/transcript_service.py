@@ -0,0 +1,125 @@
+import threading
+import time
+
+from pymongo.errors import BulkWriteError
+
+from app.config import Config
+from app.models.meeting_model import Meeting
+from app.models.transcript_segment_model import TranscriptSegment
+from app.services.meeting_service import apply_speaker_names
+
+
+DUPLICATE_KEY = 11000
+
+
+def format_line(speaker_id, text):
+    return f"Người {speaker_id}: {text}"
+
+
+class SegmentBuffer:
+    """
+    Bộ đệm write-behind cho 1 phiên: gom segment và ghi bằng 1 lệnh insert_many
+    mỗi `flush_every` segment hoặc mỗi `flush_ms` mili giây.
+    """
+
+    def __init__(self, sid, flush_every=None, flush_ms=None):
+        self.sid = sid
+        self.flush_every = flush_every or Config.TRANSCRIPT_FLUSH_SEGMENTS
+        self.flush_ms = flush_ms or Config.TRANSCRIPT_FLUSH_MS
+        self.pending = []
+        self.next_seq = TranscriptSegment.objects(sid=sid).count()
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+    def add(self, speaker_id, text, start_time=None, end_time=None):
+        """Thêm 1 segment, trả về True nếu đã tới lúc flush."""
+        with self.lock:
+            self.pending.append(TranscriptSegment(
+                sid=self.sid,
+                seq=self.next_seq,
+                speaker_id=str(speaker_id),
+                text=text,
+                start_time=start_time,
+                end_time=end_time,
+            ))
+            self.next_seq += 1
+            return self._due()
+
+    def _due(self):
+        if not self.pending:
+            return False
+        elapsed_ms = (time.monotonic() - self.last_flush) * 1000
+        return len(self.pending) >= self.flush_every or elapsed_ms >= self.flush_ms
+
+    def due(self):
+        with self.lock:
+            return self._due()
+
+    def flush(self):
+        """Ghi các segment đang chờ (blocking, nên gọi trong executor)."""
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, []
+                self.last_flush = time.monotonic()
+            if not batch:
+                return 0
+            try:
+                # unordered: 1 dòng lỗi không chặn các dòng sau; dòng đã ghi ở lần trước
+                # (insert lỗi giữa chừng / timeout sau khi đã ghi) chỉ trùng key (sid, seq)
+                TranscriptSegment._get_collection().insert_many(
+                    [segment.to_mongo() for segment in batch], ordered=False
+                )
+            except BulkWriteError as e:
+                failed = [
+                    batch[err["index"]] for err in e.details.get("writeErrors", [])
+                    if err.get("code") != DUPLICATE_KEY
+                ]
+                if failed:
+                    # Chỉ giữ lại các dòng thực sự chưa ghi được
+                    with self.lock:
+                        self.pending = failed + self.pending
+                    raise
+                return len(batch)
+            except Exception:
+                # Không rõ đã ghi tới đâu: giữ cả batch, lần sau dòng đã ghi sẽ bị bỏ qua (trùng key)
+                with self.lock:
+                    self.pending = batch + self.pending
+                raise
+            return len(batch)
+
+
+def get_segments(sid):
+    return TranscriptSegment.objects(sid=sid).order_by("seq")
+
+
+def build_full_transcript(sid, speaker_names=None):
+    """Dựng transcript từ segment (áp dụng tên người nói nếu có)."""
+    lines = [format_line(s.speaker_id, s.text) for s in get_segments(sid).only("speaker_id", "text")]
+    transcript = "\n".join(lines)
+    return apply_speaker_names(transcript, speaker_names) if speaker_names else transcript
+
+
+def get_full_transcript(meeting):
+    """full_transcript đã materialize, hoặc dựng tạm từ segment khi cuộc họp đang diễn ra."""
+    if meeting is None:
+        return ""
+    if meeting.full_transcript:
+        return meeting.full_transcript
+    return build_full_transcript(meeting.sid, meeting.speaker_names)
+
+
+def materialize_transcript(sid):
+    """Ghi full_transcript 1 lần khi cuộc họp kết thúc."""
+    meeting = Meeting.objects(sid=sid).first()
+    if not meeting:
+        return None
+    transcript = build_full_transcript(sid, meeting.speaker_names)
+    if transcript:
+        meeting.update(set__full_transcript=transcript)
+        meeting.full_transcript = transcript
+    return meeting
+
+
+def delete_segments(sid):
+    return TranscriptSegment.objects(sid=sid).delete()
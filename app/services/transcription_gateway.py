@@ -0,0 +1,119 @@
+import asyncio
+
+from eventlet import patcher
+
+from app.services.speechmatics_pool import pool
+from app.services.speechmatics_service import sm_worker
+
+# Thread native thật (không phải green thread) để chạy loop asyncio
+_threading = patcher.original("threading")
+
+
+class TranscriptionGateway:
+    """
+    1 loop asyncio chạy lâu dài trong 1 thread riêng, sở hữu toàn bộ websocket
+    Speechmatics. Socket handler chỉ đăng ký/huỷ phiên và đẩy audio (không chặn),
+    nên số cuộc họp đồng thời không còn bị giới hạn bởi số thread tpool.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.sessions = {}  # sid -> (asyncio.Queue, Task); chỉ truy cập trong thread của loop
+        self._lock = _threading.Lock()
+        self.scheduled = {}  # sid -> số gói audio đã gửi sang loop nhưng chưa vào queue
+
+    def start(self):
+        with self._lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            ready = _threading.Event()
+            self.thread = _threading.Thread(
+                target=self._run, args=(ready,), name="transcription-gateway", daemon=True
+            )
+            self.thread.start()
+            ready.wait()
+
+    def _run(self, ready):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        # Pre-warm phiên Speechmatics ngay khi loop chạy
+        pool.start(loop)
+        ready.set()
+        loop.run_forever()
+
+    def _call(self, fn, *args):
+        self.start()
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def register(self, sid, emit_channel, user_id=None, **options):
+        """
+        Mở phiên Speechmatics cho sid; transcript được đẩy vào emit_channel.
+        options được chuyển nguyên cho sm_worker (vad, partial_mode, live_summary).
+        """
+        self._call(self._open_session, sid, emit_channel, user_id, options)
+
+    def push_audio(self, sid, chunk):
+        """Đẩy 1 gói audio cho phiên (gọi từ hub, không chặn)."""
+        with self._lock:
+            self.scheduled[sid] = self.scheduled.get(sid, 0) + 1
+        self._call(self._put_audio, sid, chunk)
+
+    def backlog(self, sid):
+        """Số gói audio đang chờ gửi lên Speechmatics (ước lượng, đọc từ thread khác)."""
+        session = self.sessions.get(sid)
+        queued = session[0].qsize() if session is not None else 0
+        return self.scheduled.get(sid, 0) + queued
+
+    def unregister(self, sid):
+        """Kết thúc phiên: đóng websocket sau khi gửi hết audio đang chờ."""
+        self._call(self._put, sid, None)
+
+    def cancel(self, sid):
+        """Huỷ cứng phiên (không chờ audio còn lại), dùng khi phiên treo sau unregister."""
+        self._call(self._cancel, sid)
+
+    def session_ids(self):
+        return list(self.sessions)
+
+    # --- Các hàm dưới đây chạy trong thread của loop ---
+
+    def _open_session(self, sid, emit_channel, user_id, options):
+        if sid in self.sessions:
+            return
+        audio_queue = asyncio.Queue()
+        task = self.loop.create_task(self._run_session(sid, audio_queue, emit_channel, user_id, options))
+        self.sessions[sid] = (audio_queue, task)
+
+    def _put_audio(self, sid, chunk):
+        with self._lock:
+            remaining = self.scheduled.get(sid, 0) - 1
+            if remaining > 0:
+                self.scheduled[sid] = remaining
+            else:
+                self.scheduled.pop(sid, None)
+        self._put(sid, chunk)
+
+    def _cancel(self, sid):
+        session = self.sessions.get(sid)
+        if session is not None:
+            session[1].cancel()
+
+    def _put(self, sid, chunk):
+        session = self.sessions.get(sid)
+        if session is not None:
+            session[0].put_nowait(chunk)
+
+    async def _run_session(self, sid, audio_queue, emit_channel, user_id, options):
+        try:
+            await sm_worker(sid, audio_queue, emit_channel, user_id, **options)
+        except Exception as e:
+            print(f"[Gateway] Session {sid} failed: {e}")
+        finally:
+            self.sessions.pop(sid, None)
+            if emit_channel is not None:
+                emit_channel.put(None)
+
+
+gateway = TranscriptionGateway()
@@ -0,0 +1,135 @@
+from bisect import bisect_right
+from collections import deque
+
+import numpy as np
+
+from app.config import Config
+
+SAMPLE_RATE = 16000
+BYTES_PER_SECOND = SAMPLE_RATE * 2  # pcm_s16le mono
+
+
+def frame_features(pcm, frame_samples):
+    """
+    RMS (dBFS) và tỉ lệ đổi dấu (zero-crossing rate) cho từng frame của 1 gói PCM s16le.
+    Gói ngắn hơn 1 frame được tính như 1 frame.
+    """
+    samples = np.frombuffer(pcm, dtype="<i2")
+    if samples.size == 0:
+        return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+    n_frames = max(1, samples.size // frame_samples)
+    usable = samples[:n_frames * frame_samples] if samples.size >= frame_samples else samples
+    frames = usable.reshape(n_frames, -1).astype(np.float32) / 32768.0
+
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-9))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(frames.shape[1] - 1, 1)
+    return db.astype(np.float32), zcr.astype(np.float32)
+
+
+class VoiceActivityDetector:
+    """
+    VAD theo năng lượng + zero-crossing, chạy trên từng gói audio đã gom (~100 ms).
+    - Gói có tiếng nói được gửi ngay, kèm vài gói im lặng ngay trước đó (pre-roll).
+    - Sau tiếng nói vẫn gửi thêm hangover_ms để không cắt cụt đuôi câu.
+    - Khoảng im lặng dài bị bỏ, chỉ gửi 1 frame keep-alive mỗi keepalive_seconds
+      để websocket không bị đóng vì thiếu audio.
+    Vì audio bị bỏ làm lệch timestamp của Speechmatics, VAD ghi lại mốc để
+    `to_source_time` đổi thời gian upstream về thời gian thật của cuộc họp.
+    """
+
+    def __init__(self, energy_dbfs=None, zcr_min=None, hangover_ms=None,
+                 preroll_ms=None, keepalive_seconds=None, frame_ms=20):
+        self.energy_dbfs = Config.VAD_ENERGY_DBFS if energy_dbfs is None else energy_dbfs
+        self.zcr_min = Config.VAD_ZCR_MIN if zcr_min is None else zcr_min
+        self.hangover_seconds = (Config.VAD_HANGOVER_MS if hangover_ms is None else hangover_ms) / 1000
+        self.preroll_seconds = (Config.VAD_PREROLL_MS if preroll_ms is None else preroll_ms) / 1000
+        self.keepalive_seconds = Config.VAD_KEEPALIVE_SECONDS if keepalive_seconds is None else keepalive_seconds
+        self.frame_samples = SAMPLE_RATE * frame_ms // 1000
+        # 10 ms im lặng tuyệt đối
+        self.keepalive_frame = bytes(BYTES_PER_SECOND // 100)
+
+        self.preroll = deque()
+        self.preroll_bytes = 0
+        self.hangover_left = 0.0
+        self.since_keepalive = 0.0
+
+        self.source_seconds = 0.0     # thời gian audio thật đã nhận
+        self.upstream_seconds = 0.0   # thời gian audio đã gửi lên Speechmatics
+        self.suppressed_seconds = 0.0
+        # (upstream_seconds, độ lệch source - upstream) tại mỗi lần tiếp tục gửi sau khoảng bỏ
+        self.marks = [(0.0, 0.0)]
+        self.suppressing = False
+
+    def is_speech(self, pcm):
+        db, zcr = frame_features(pcm, self.frame_samples)
+        if db.size == 0:
+            return False
+        loud = db >= self.energy_dbfs
+        # Phụ âm xát (s, x, ph) năng lượng thấp nhưng đổi dấu nhiều
+        fricative = (db >= self.energy_dbfs - 10) & (zcr >= self.zcr_min)
+        return bool(np.any(loud | fricative))
+
+    def _send(self, pcm, source_start, out):
+        if self.suppressing:
+            self.marks.append((self.upstream_seconds, source_start - self.upstream_seconds))
+            self.suppressing = False
+        out.append(pcm)
+        self.upstream_seconds += len(pcm) / BYTES_PER_SECOND
+
+    def process(self, pcm):
+        """Nhận 1 gói PCM, trả về list gói cần gửi upstream (có thể rỗng)."""
+        duration = len(pcm) / BYTES_PER_SECOND
+        out = []
+
+        if self.is_speech(pcm):
+            # Gửi pre-roll trước (đúng thứ tự thời gian)
+            start = self.source_seconds - self.preroll_bytes / BYTES_PER_SECOND
+            while self.preroll:
+                buffered = self.preroll.popleft()
+                self._send(buffered, start, out)
+                start += len(buffered) / BYTES_PER_SECOND
+            self.suppressed_seconds -= self.preroll_bytes / BYTES_PER_SECOND
+            self.preroll_bytes = 0
+
+            self._send(pcm, self.source_seconds, out)
+            self.hangover_left = self.hangover_seconds
+            self.since_keepalive = 0.0
+        elif self.hangover_left > 0:
+            self._send(pcm, self.source_seconds, out)
+            self.hangover_left -= duration
+            self.since_keepalive = 0.0
+        else:
+            self.suppressing = True
+            self.suppressed_seconds += duration
+            self.preroll.append(pcm)
+            self.preroll_bytes += len(pcm)
+            while self.preroll and self.preroll_bytes - len(self.preroll[0]) >= self.preroll_seconds * BYTES_PER_SECOND:
+                self.preroll_bytes -= len(self.preroll.popleft())
+
+            self.since_keepalive += duration
+            if self.since_keepalive >= self.keepalive_seconds:
+                self.since_keepalive = 0.0
+                out.append(self.keepalive_frame)
+                self.upstream_seconds += len(self.keepalive_frame) / BYTES_PER_SECOND
+
+        self.source_seconds += duration
+        return out
+
+    def to_source_time(self, upstream_time):
+        """Đổi timestamp của Speechmatics (theo audio đã gửi) về thời gian thật của cuộc họp."""
+        if upstream_time is None:
+            return None
+        marks = self.marks
+        index = bisect_right(marks, (upstream_time, float("inf"))) - 1
+        return upstream_time + marks[max(index, 0)][1]
+
+    def stats(self):
+        total = self.source_seconds
+        return {
+            "source_seconds": round(total, 2),
+            "upstream_seconds": round(self.upstream_seconds, 2),
+            "suppressed_seconds": round(self.suppressed_seconds, 2),
+            "suppressed_fraction": round(self.suppressed_seconds / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,423 @@
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy as np
+
+from ..config import Config
+from ..models.chunk_model import Chunk
+from ..models.index_version_model import IndexVersion
+from .embedding_codec import EMBEDDING_PROJECTION, doc_vector, stack_vectors
+from .lexical_index import LexicalIndex
+from .quantization import int8_scores, quantize_int8, top_k_indexes
+
+
+class VectorIndex:
+    """
+    Index vector trong bộ nhớ cho 1 cặp (user_id, folder_id).
+    Embedding được chuẩn hoá sẵn và lưu trong 1 ma trận float32 liền mạch,
+    nên mỗi truy vấn top-k chỉ cần 1 phép nhân ma trận-vector + argpartition.
+
+    Tenant lớn (>= VECTOR_INDEX_QUANTIZE_MIN_ROWS chunk) được lưu dạng int8
+    (codes + scale mỗi dòng, ~4 lần nhỏ hơn): lượt đầu quét codes, sau đó
+    shortlist được chấm lại chính xác bằng vector gốc đọc từ Chunk.
+    """
+
+    def __init__(self, user_id, folder_id):
+        self.user_id = user_id
+        self.folder_id = folder_id
+        self.ids = []
+        self.file_ids = np.empty(0, dtype=object)
+        self.dim = 0
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.codes = None   # int8 [n, d] khi quantized
+        self.scales = None  # float32 [n] khi quantized
+        self.lexical = None  # LexicalIndex, build lazy, cập nhật tăng dần theo add/remove_file
+        self.version = 0
+        self.synced = 0  # IndexVersion của folder lúc load (VECTOR_INDEX_SYNC)
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def quantized(self):
+        return self.codes is not None
+
+    @staticmethod
+    def _normalize(matrix):
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _query(self):
+        return Chunk.objects(user_id=self.user_id, folder_id=self.folder_id)
+
+    def load(self):
+        query = self._query()
+
+        ids, file_ids, vectors = [], [], []
+        for doc in query.only("id", "file_id", *EMBEDDING_PROJECTION).as_pymongo():
+            vector = doc_vector(doc)
+            if vector is None:
+                continue
+            ids.append(str(doc["_id"]))
+            file_ids.append(doc.get("file_id"))
+            vectors.append(vector)
+
+        self._set(ids, file_ids, vectors)
+        return self
+
+    def _store(self, matrix):
+        """Gán ma trận đã chuẩn hoá (gọi khi đang giữ lock), quantize nếu đủ lớn."""
+        threshold = Config.VECTOR_INDEX_QUANTIZE_MIN_ROWS
+        self.dim = matrix.shape[1] if matrix.ndim == 2 else 0
+        if threshold and matrix.shape[0] >= threshold:
+            self.codes, self.scales = quantize_int8(matrix)
+            self.matrix = np.empty((0, self.dim), dtype=np.float32)
+        else:
+            self.codes = self.scales = None
+            self.matrix = matrix
+        self.version += 1
+
+    def _set(self, ids, file_ids, vectors):
+        matrix, keep = stack_vectors(vectors)
+        with self.lock:
+            self.ids = [i for i, ok in zip(ids, keep) if ok]
+            self.file_ids = np.array([f for f, ok in zip(file_ids, keep) if ok], dtype=object)
+            self._store(self._normalize(matrix) if matrix.size else matrix)
+            self.lexical = None
+
+    def add(self, chunks, skip_existing=False):
+        """
+        Thêm các Chunk mới (đã lưu DB) vào index mà không cần load lại.
+        skip_existing: bỏ qua chunk đã có (chunk thêm trong lúc load có thể đã nằm trong snapshot).
+        """
+        chunks = [c for c in chunks if c.id is not None]
+        if skip_existing:
+            known = set(self.ids)
+            chunks = [c for c in chunks if str(c.id) not in known]
+        lexical = self.lexical
+        if lexical is not None:
+            # BM25 đã build -> thêm document mới thay vì build lại từ Mongo
+            lexical.add((str(c.id), c.file_id, c.text or "") for c in chunks)
+        pairs = [(c, doc_vector(c)) for c in chunks]
+        pairs = [(c, v) for c, v in pairs if v is not None]
+        if not pairs:
+            return
+
+        new_matrix, keep = stack_vectors([v for _, v in pairs])
+        chunks = [c for (c, _), ok in zip(pairs, keep) if ok]
+        new_matrix = self._normalize(new_matrix)
+        with self.lock:
+            if len(self.ids) and new_matrix.shape[1] != self.dim:
+                # Khác số chiều (đổi model embedding) -> bỏ qua, lần load sau sẽ đúng
+                return
+            self.ids = self.ids + [str(c.id) for c in chunks]
+            self.file_ids = np.concatenate([self.file_ids, np.array([c.file_id for c in chunks], dtype=object)])
+            if self.quantized:
+                codes, scales = quantize_int8(new_matrix)
+                self.codes = np.vstack([self.codes, codes])
+                self.scales = np.concatenate([self.scales, scales])
+                self.version += 1
+            else:
+                self._store(new_matrix if self.matrix.size == 0 else np.vstack([self.matrix, new_matrix]))
+
+    def remove_file(self, file_id):
+        lexical = self.lexical
+        if lexical is not None:
+            lexical.remove_file(file_id)
+            # Quá nhiều tombstone -> build lại lần search sau cho gọn và idf đúng
+            if lexical.tombstones > len(lexical):
+                self.lexical = None
+        with self.lock:
+            if not len(self.ids):
+                return
+            keep = self.file_ids != file_id
+            if keep.all():
+                return
+            self.ids = [i for i, k in zip(self.ids, keep) if k]
+            self.file_ids = self.file_ids[keep]
+            if self.quantized:
+                self.codes = self.codes[keep]
+                self.scales = self.scales[keep]
+                self.version += 1
+            else:
+                self._store(self.matrix[keep])
+
+    def get_lexical(self):
+        """Inverted index BM25 trên Chunk.text của cùng tập chunk."""
+        lexical, version = self.lexical, self.version
+        if lexical is not None:
+            return lexical
+
+        docs = (
+            (str(doc["_id"]), doc.get("file_id"), doc.get("text", ""))
+            for doc in self._query().only("id", "file_id", "text").as_pymongo()
+        )
+        lexical = LexicalIndex().build(docs)
+        with self.lock:
+            if self.version == version:
+                self.lexical = lexical
+        return lexical
+
+    def search(self, query_vector, top_k=5, file_ids=None):
+        """
+        Trả về list (chunk_id, score) theo thứ tự điểm giảm dần.
+        """
+        with self.lock:
+            ids, row_file_ids, dim = self.ids, self.file_ids, self.dim
+            matrix, codes, scales = self.matrix, self.codes, self.scales
+
+        if not ids or top_k <= 0:
+            return []
+
+        q = np.asarray(query_vector, dtype=np.float32)
+        if q.shape[0] != dim:
+            return []
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        q = q / norm
+
+        if codes is not None:
+            scores = int8_scores(codes, scales, q)
+        else:
+            scores = matrix @ q
+
+        candidates = np.arange(len(ids))
+        if file_ids:
+            candidates = np.flatnonzero(np.isin(row_file_ids, list(file_ids)))
+            if candidates.size == 0:
+                return []
+            scores = scores[candidates]
+
+        if codes is None:
+            top = top_k_indexes(scores, top_k)
+            return [(ids[candidates[i]], float(scores[i])) for i in top]
+
+        shortlist = top_k_indexes(scores, top_k * Config.VECTOR_INDEX_RERANK_FACTOR)
+        return self._rerank([ids[candidates[i]] for i in shortlist], q, top_k)
+
+    def _rerank(self, chunk_ids, q, top_k):
+        """Chấm lại shortlist bằng vector full-precision đọc từ Chunk."""
+        docs = Chunk.objects(id__in=chunk_ids).only("id", *EMBEDDING_PROJECTION).as_pymongo()
+        exact_ids, vectors = [], []
+        for doc in docs:
+            vector = doc_vector(doc)
+            if vector is not None and vector.shape[0] == q.shape[0]:
+                exact_ids.append(str(doc["_id"]))
+                vectors.append(vector)
+        if not vectors:
+            return []
+
+        matrix, _ = stack_vectors(vectors)
+        scores = self._normalize(matrix) @ q
+        return [(exact_ids[i], float(scores[i])) for i in top_k_indexes(scores, top_k)]
+
+
+_indexes = OrderedDict()
+# key đang load -> thao tác tới trong lúc load (("add", chunks) / ("remove", file_id) / ("invalidate",))
+_loading = {}
+_registry_lock = threading.Lock()
+
+
+def _version_key(folder_id):
+    return f"folder:{folder_id}"
+
+
+def _read_version(folder_id):
+    doc = IndexVersion.objects(key=_version_key(folder_id)).only("version").as_pymongo().first()
+    return doc.get("version", 0) if doc else 0
+
+
+def _is_stale(index):
+    """Index đã bị worker khác làm cũ (kiểm tra tối đa mỗi VECTOR_INDEX_SYNC_SECONDS)."""
+    if not Config.VECTOR_INDEX_SYNC:
+        return False
+    now = time.time()
+    if now - index.checked_at < Config.VECTOR_INDEX_SYNC_SECONDS:
+        return False
+    index.checked_at = now
+    try:
+        return _read_version(index.folder_id) != index.synced
+    except Exception as e:
+        print(f"[VectorIndex] Version check failed: {e}")
+        return False
+
+
+def _publish(folder_id):
+    """Tăng version của folder trong Mongo để worker khác biết chunk đã đổi."""
+    if not Config.VECTOR_INDEX_SYNC or not folder_id:
+        return
+    try:
+        doc = IndexVersion.objects(key=_version_key(folder_id)).modify(
+            upsert=True,
+            new=True,
+            inc__version=1,
+            set__updated_at=datetime.utcnow(),
+        )
+    except Exception as e:
+        print(f"[VectorIndex] Publish version for {folder_id} failed: {e}")
+        return
+    # Index local đã áp dụng thay đổi này -> không cần load lại vì chính nó
+    with _registry_lock:
+        local = [_indexes[k] for k in _matching_keys(folder_id=folder_id)]
+    for index in local:
+        if index.synced == doc.version - 1:
+            index.synced = doc.version
+
+
+def get_index(user_id, folder_id):
+    key = (user_id, folder_id)
+    with _registry_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+    if index is not None:
+        if not _is_stale(index):
+            return index
+        with _registry_lock:
+            if _indexes.get(key) is index:
+                del _indexes[key]
+
+    with _registry_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            return index
+        # Giữ chỗ để add/remove trong lúc load không bị mất (đã có người load thì không đăng ký)
+        owner = key not in _loading
+        if owner:
+            _loading[key] = []
+
+    index = VectorIndex(user_id, folder_id)
+    try:
+        # Đọc version trước khi load: thay đổi trong lúc load sẽ làm index bị load lại sau
+        if Config.VECTOR_INDEX_SYNC:
+            index.synced = _read_version(folder_id)
+            index.checked_at = time.time()
+        index.load()
+    except Exception:
+        if owner:
+            with _registry_lock:
+                _loading.pop(key, None)
+        raise
+    if not owner:
+        return index
+
+    with _registry_lock:
+        ops = _loading.pop(key, [])
+        if any(op[0] == "invalidate" for op in ops):
+            # Bị invalidate giữa chừng: dùng tạm cho lần này, không cache
+            return index
+        for op in ops:
+            if op[0] == "add":
+                index.add(op[1], skip_existing=True)
+            else:
+                index.remove_file(op[1])
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > Config.VECTOR_INDEX_MAX_ENTRIES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _matching_keys(user_id=None, folder_id=None, keys=None):
+    return [
+        key for key in (_indexes if keys is None else keys)
+        if (user_id is None or key[0] == user_id)
+        and (folder_id is None or key[1] == folder_id)
+    ]
+
+
+def invalidate(user_id=None, folder_id=None):
+    """Xoá index của (user_id, folder_id); bỏ trống 1 trong 2 = mọi giá trị."""
+    with _registry_lock:
+        for key in _matching_keys(user_id, folder_id):
+            _indexes.pop(key, None)
+        for key in _matching_keys(user_id, folder_id, _loading):
+            _loading[key].append(("invalidate",))
+    _publish(folder_id)
+
+
+def add_chunks(chunks):
+    """Cập nhật tăng dần các index đã load sau khi insert Chunk."""
+    groups = {}
+    for c in chunks:
+        groups.setdefault((c.user_id, c.folder_id), []).append(c)
+
+    for (user_id, folder_id), items in groups.items():
+        with _registry_lock:
+            targets = [_indexes[k] for k in _matching_keys(user_id, folder_id)]
+            for key in _matching_keys(user_id, folder_id, _loading):
+                _loading[key].append(("add", items))
+        for index in targets:
+            index.add(items)
+        _publish(folder_id)
+
+
+def remove_file(user_id, folder_id, file_id):
+    with _registry_lock:
+        targets = [_indexes[k] for k in _matching_keys(user_id, folder_id)]
+        for key in _matching_keys(user_id, folder_id, _loading):
+            _loading[key].append(("remove", file_id))
+    for index in targets:
+        index.remove_file(file_id)
+    _publish(folder_id)
+
+
+def stream_top_k(query_set, query_vector, top_k=5, batch_size=512):
+    """
+    Quét toàn bộ cursor theo batch cố định (chỉ lấy _id + embedding),
+    chấm điểm từng batch bằng 1 phép nhân ma trận và giữ heap top-k.
+    Bộ nhớ không đổi theo kích thước corpus. Trả về list (chunk_id, score).
+    """
+    q = np.asarray(query_vector, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    if norm == 0 or top_k <= 0:
+        return []
+    q = q / norm
+
+    heap = []  # min-heap (score, id), tối đa top_k phần tử
+
+    def score_batch(ids, vectors):
+        matrix, keep = stack_vectors(vectors)
+        if not matrix.size or matrix.shape[1] != q.shape[0]:
+            return
+        ids = [i for i, ok in zip(ids, keep) if ok]
+        scores = VectorIndex._normalize(matrix) @ q
+        k = min(top_k, scores.shape[0])
+        for row in np.argpartition(-scores, k - 1)[:k]:
+            item = (float(scores[row]), ids[row])
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+
+    cursor = query_set.only("id", *EMBEDDING_PROJECTION).as_pymongo().batch_size(batch_size)
+    ids, vectors = [], []
+    for doc in cursor:
+        vector = doc_vector(doc)
+        if vector is None:
+            continue
+        ids.append(str(doc["_id"]))
+        vectors.append(vector)
+        if len(ids) >= batch_size:
+            score_batch(ids, vectors)
+            ids, vectors = [], []
+    if ids:
+        score_batch(ids, vectors)
+
+    return [(chunk_id, score) for score, chunk_id in sorted(heap, reverse=True)]
+
+
+def fetch_chunks(scored_ids):
+    """Lấy Chunk (không kèm embedding) theo đúng thứ tự của kết quả search."""
+    if not scored_ids:
+        return []
+    query = Chunk.objects(id__in=[i for i, _ in scored_ids]).exclude(*EMBEDDING_PROJECTION)
+    by_id = {str(c.id): c for c in query}
+    return [by_id[i] for i, _ in scored_ids if i in by_id]
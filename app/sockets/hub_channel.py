@@ -0,0 +1,71 @@
+from collections import deque
+
+from eventlet import hubs, patcher
+
+# Dùng bản gốc (không green) vì put() được gọi từ native thread (tpool)
+_os = patcher.original("os")
+_threading = patcher.original("threading")
+
+
+class HubChannel:
+    """
+    Kênh 1 chiều từ native thread sang greenlet trên hub eventlet.
+    put() an toàn khi gọi từ bất kỳ thread nào; greenlet đọc bằng get_batch()
+    sẽ ngủ trên 1 pipe cho tới khi có dữ liệu (không polling), và nhận
+    toàn bộ item đang chờ trong 1 lần.
+    """
+
+    def __init__(self):
+        self._items = deque()
+        self._lock = _threading.Lock()
+        self._rfd, self._wfd = _os.pipe()
+        _os.set_blocking(self._rfd, False)
+        _os.set_blocking(self._wfd, False)
+        self._signalled = False
+        self._closed = False
+
+    def put(self, item):
+        with self._lock:
+            if self._closed:
+                return
+            self._items.append(item)
+            # Chỉ đánh thức hub 1 lần cho mỗi lượt đọc
+            if self._signalled:
+                return
+            self._signalled = True
+            try:
+                _os.write(self._wfd, b"\0")
+            except BlockingIOError:
+                pass
+
+    def _drain_pipe(self):
+        try:
+            while _os.read(self._rfd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    def get_batch(self):
+        """Chặn greenlet hiện tại tới khi có item, trả về list các item đang chờ."""
+        while True:
+            with self._lock:
+                if self._items:
+                    items = list(self._items)
+                    self._items.clear()
+                    self._signalled = False
+                    self._drain_pipe()
+                    return items
+                if self._closed:
+                    return [None]
+            hubs.trampoline(self._rfd, read=True)
+
+    def qsize(self):
+        return len(self._items)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            _os.close(self._rfd)
+            _os.close(self._wfd)
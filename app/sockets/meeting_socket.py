@@ -1,39 +1,24 @@
-import eventlet
-from eventlet import tpool
-from queue import Queue
 from flask import request
 from flask_socketio import emit
 from app.extensions import socketio
-from app.services.speechmatics_service import run_sm_worker
+from app.config import Config
+from app.services.audio_codec import SUPPORTED_ENCODINGS, AudioDecoder
+from app.services.audio_ingest import AudioIngest
+from app.services.vad import VoiceActivityDetector
 from app.services.meeting_service import get_or_create_meeting, update_speaker_name
 from app.services.plan_service import get_plan_limits, get_user_plan
 from app.models.meeting_model import Meeting
+from app.sockets.session_supervisor import supervisor
 
-# Dictionary lưu queue cho từng sid active
-audio_queues = {}
-emit_queues = {}
-
-
-def _emit_loop(sid, emit_queue):
-    while True:
-        try:
-            item = emit_queue.get_nowait()
-        except Exception:
-            eventlet.sleep(0.01)
-            continue
-
-        if item is None:
-            break
-
-        event = item.get("event")
-        data = item.get("data")
-        if event and data is not None:
-            socketio.emit(event, data, room=sid)
 
 @socketio.on("start_streaming")
 def start_streaming(data=None):
     sid = request.sid
 
+    if supervisor.has(sid):
+        emit("status", {"msg": "Streaming already started for this session"})
+        return
+
     user_id = None
     if isinstance(data, dict):
         user_id = data.get("user_id")
@@ -56,38 +41,70 @@ def start_streaming(data=None):
             })
             return
 
+    # Client chọn định dạng audio: pcm_s16le (mặc định), mulaw hoặc ima_adpcm
+    encoding = "pcm_s16le"
+    block_align = Config.ADPCM_BLOCK_ALIGN
+    if isinstance(data, dict):
+        encoding = data.get("audio_encoding") or encoding
+        block_align = data.get("adpcm_block_align") or block_align
+    try:
+        decoder = AudioDecoder(encoding, int(block_align))
+    except (TypeError, ValueError):
+        emit("status", {
+            "msg": "Unsupported audio encoding",
+            "audio_encoding": encoding,
+            "supported": list(SUPPORTED_ENCODINGS),
+        })
+        return
+
+    # Partial transcript: "full" (mặc định) hoặc "delta" (chỉ phần đuôi thay đổi)
+    partial_mode = "full"
+    if isinstance(data, dict) and data.get("partial_mode") == "delta":
+        partial_mode = "delta"
+
     title = None
     if isinstance(data, dict):
         title = data.get("title")
     get_or_create_meeting(sid, user_id, title=title)
 
-    # ✅ Dùng Queue thread-safe
-    audio_queues[sid] = Queue()
-    emit_queues[sid] = Queue()
-
-    # ✅ Chạy worker bằng native thread (tránh loop đang chạy của eventlet)
-    eventlet.spawn_n(tpool.execute, run_sm_worker, sid, audio_queues[sid], emit_queues[sid])
-
-    # ✅ Greenlet emit để tránh switch thread
-    eventlet.spawn_n(_emit_loop, sid, emit_queues[sid])
+    # Thời lượng tối đa theo gói cước, luôn có trần SESSION_MAX_SECONDS (None = chỉ dùng trần)
+    duration_minutes = limits.get("meeting_duration_minutes")
+    max_seconds = Config.SESSION_MAX_SECONDS
+    if duration_minutes:
+        max_seconds = min(duration_minutes * 60, Config.SESSION_MAX_SECONDS)
+
+    # ✅ Supervisor sở hữu kênh emit, bộ gom audio, VAD và phiên Speechmatics trên gateway
+    session = supervisor.open(
+        sid,
+        user_id,
+        plan,
+        AudioIngest(decoder=decoder),
+        vad=VoiceActivityDetector() if limits.get("vad") else None,
+        partial_mode=partial_mode,
+        max_seconds=max_seconds,
+        # Gói có in_meeting_ai: tóm tắt cuốn chiếu trong lúc họp
+        live_summary=bool(limits.get("in_meeting_ai")),
+    )
+    if session is None:
+        emit("status", {"msg": "Streaming already started for this session"})
+        return
 
-    emit("status", {"msg": "Speechmatics ready"})
+    emit("status", {
+        "msg": "Speechmatics ready",
+        "audio_encoding": decoder.encoding,
+        "adpcm_block_align": decoder.block_align if decoder.encoding == "ima_adpcm" else None,
+        "partial_mode": partial_mode,
+    })
 
 
 @socketio.on("audio_data")
 def audio_data(data):
-    sid = request.sid
-    if sid in audio_queues and len(data) > 5:
-        audio_queues[sid].put(data[5:])
+    supervisor.feed(request.sid, data)
 
 
 @socketio.on("end_meeting")
 def end_meeting():
-    sid = request.sid
-    if sid in audio_queues:
-        audio_queues[sid].put(None)
-    if sid in emit_queues:
-        emit_queues[sid].put(None)
+    supervisor.close(request.sid, "end_meeting")
 
 
 @socketio.on("set_speaker_name")
@@ -107,5 +124,5 @@ def set_speaker_name(data=None):
 
 @socketio.on("disconnect")
 def disconnect():
-    audio_queues.pop(request.sid, None)
-    emit_queues.pop(request.sid, None)
+    # Vẫn đẩy nốt audio và lưu transcript, chỉ là client đã rời đi
+    supervisor.close(request.sid, "disconnect")
@@ -0,0 +1,193 @@
+import time
+
+import eventlet
+
+from app.config import Config
+from app.extensions import socketio
+from app.services.session_registry import registry, worker_id
+from app.services.transcription_gateway import gateway
+from app.sockets.hub_channel import HubChannel
+
+
+class StreamingSession:
+    """Tài nguyên của 1 phiên stream: kênh emit, bộ gom audio, VAD và phiên trên gateway."""
+
+    def __init__(self, sid, user_id, plan, ingest, vad=None, max_seconds=None):
+        self.sid = sid
+        self.user_id = user_id
+        self.plan = plan
+        self.channel = HubChannel()
+        self.ingest = ingest
+        self.vad = vad
+        self.max_seconds = max_seconds
+        self.started_at = time.time()
+        self.last_audio_at = self.started_at
+        self.closed_at = None
+        self.close_reason = None
+        self.upstream_bytes = 0
+        self.events_out = 0
+
+    def forward(self, packets):
+        for packet in packets:
+            for out in (self.vad.process(packet) if self.vad is not None else (packet,)):
+                self.upstream_bytes += len(out)
+                gateway.push_audio(self.sid, out)
+
+    def summary(self):
+        """Thông tin gọn để ghi vào registry (các worker khác đọc được)."""
+        return {
+            "user_id": self.user_id,
+            "plan": self.plan,
+            "started_at": self.started_at,
+            "state": "closing" if self.closed_at else "streaming",
+            "bytes_in": self.ingest.counters["wire_bytes_in"],
+            "bytes_out": self.upstream_bytes,
+        }
+
+    def stats(self, now=None):
+        now = now or time.time()
+        ingest = self.ingest.stats()
+        return {
+            "sid": self.sid,
+            "user_id": self.user_id,
+            "plan": self.plan,
+            "state": "closing" if self.closed_at else "streaming",
+            "age_seconds": round(now - self.started_at, 1),
+            "idle_seconds": round(now - self.last_audio_at, 1),
+            "max_seconds": self.max_seconds,
+            "bytes_in": ingest["wire_bytes_in"],
+            "bytes_out": self.upstream_bytes,
+            "bytes_dropped": ingest["bytes_dropped"],
+            "buffered_bytes": ingest["buffered_bytes"],
+            "upstream_backlog": gateway.backlog(self.sid),
+            "emit_queue_depth": self.channel.qsize(),
+            "events_out": self.events_out,
+            "vad": self.vad.stats() if self.vad is not None else None,
+        }
+
+
+class SessionSupervisor:
+    """
+    Quản lý vòng đời các phiên stream trên hub:
+    - mở phiên (gateway + greenlet emit), đóng phiên đúng 1 lần với mọi lý do
+      (end_meeting, disconnect, idle, quá thời lượng gói cước, upstream lỗi);
+    - watchdog định kỳ áp timeout idle / thời lượng tối đa, và huỷ cứng phiên
+      vẫn treo sau SESSION_CLOSE_GRACE_SECONDS kể từ lúc đóng.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.watchdog = None
+
+    def open(self, sid, user_id, plan, ingest, vad=None, partial_mode="full", max_seconds=None, live_summary=False):
+        """Mở phiên; trả về None nếu sid đang thuộc worker khác trong registry."""
+        session = StreamingSession(sid, user_id, plan, ingest, vad, max_seconds)
+        if not registry.claim(sid, session.summary()):
+            return None
+        self.sessions[sid] = session
+        gateway.register(
+            sid, session.channel, user_id,
+            vad=vad, partial_mode=partial_mode, live_summary=live_summary,
+        )
+        eventlet.spawn_n(self._emit_loop, session)
+        if self.watchdog is None:
+            self.watchdog = eventlet.spawn(self._watchdog)
+        return session
+
+    def has(self, sid):
+        """sid còn phiên (đang stream hoặc đang đóng)."""
+        return sid in self.sessions
+
+    def get(self, sid):
+        session = self.sessions.get(sid)
+        if session is None or session.closed_at is not None:
+            return None
+        return session
+
+    def feed(self, sid, data):
+        session = self.get(sid)
+        if session is None:
+            return
+        session.last_audio_at = time.time()
+        # Upstream tồn đọng -> giữ audio trong ring buffer của ingest thay vì đẩy tiếp
+        can_send = gateway.backlog(sid) < Config.AUDIO_MAX_BACKLOG_PACKETS
+        session.forward(session.ingest.feed(data, can_send=can_send))
+
+    def close(self, sid, reason):
+        """Đóng phiên (idempotent): đẩy nốt audio còn lại rồi báo gateway kết thúc."""
+        session = self.sessions.get(sid)
+        if session is None or session.closed_at is not None:
+            return
+        session.closed_at = time.time()
+        session.close_reason = reason
+        try:
+            session.forward(session.ingest.flush())
+        except Exception as e:
+            print(f"[Session] Flush audio failed for {sid}: {e}")
+        gateway.unregister(sid)
+        print(f"[Session] {sid} closing ({reason}): {session.stats()}")
+
+    def _emit_loop(self, session):
+        # Ngủ tới khi worker đẩy dữ liệu, rồi emit hết các item đang chờ trong 1 lượt
+        channel = session.channel
+        try:
+            while True:
+                for item in channel.get_batch():
+                    if item is None:
+                        return
+
+                    event = item.get("event")
+                    data = item.get("data")
+                    if event and data is not None:
+                        socketio.emit(event, data, room=session.sid)
+                        session.events_out += 1
+        finally:
+            # Worker kết thúc (kể cả lỗi): đảm bảo phiên được đóng và gỡ khỏi registry
+            self.close(session.sid, "upstream_closed")
+            channel.close()
+            if self.sessions.get(session.sid) is session:
+                self.sessions.pop(session.sid, None)
+                registry.release(session.sid)
+
+    def _expire(self, session, now):
+        if session.closed_at is not None:
+            if now - session.closed_at > Config.SESSION_CLOSE_GRACE_SECONDS:
+                # Worker không tự kết thúc: huỷ task và mở khoá greenlet emit
+                print(f"[Session] {session.sid} did not stop in time, cancelling")
+                gateway.cancel(session.sid)
+                session.channel.put(None)
+            return
+
+        if session.max_seconds and now - session.started_at >= session.max_seconds:
+            socketio.emit("status", {
+                "msg": "Meeting duration limit reached for current plan",
+                "plan": session.plan,
+                "limit_minutes": round(session.max_seconds / 60),
+            }, room=session.sid)
+            self.close(session.sid, "max_duration")
+        elif now - session.last_audio_at >= Config.SESSION_IDLE_TIMEOUT_SECONDS:
+            socketio.emit("status", {"msg": "Session closed: no audio received"}, room=session.sid)
+            self.close(session.sid, "idle_timeout")
+
+    def _watchdog(self):
+        while True:
+            eventlet.sleep(Config.SESSION_CHECK_SECONDS)
+            now = time.time()
+            for session in list(self.sessions.values()):
+                try:
+                    self._expire(session, now)
+                    # Gia hạn entry trong registry (worker chết -> entry tự hết hạn)
+                    registry.update(session.sid, session.summary())
+                except Exception as e:
+                    print(f"[Session] Watchdog error for {session.sid}: {e}")
+
+    def stats(self):
+        now = time.time()
+        return [session.stats(now) for session in list(self.sessions.values())]
+
+    def cluster_stats(self):
+        """Phiên của mọi worker (theo registry)."""
+        return {"worker": worker_id(), "sessions": registry.list()}
+
+
+supervisor = SessionSupervisor()
@@ -0,0 +1,106 @@
+"""
+Benchmark tốc độ giải mã audio nén (μ-law, IMA-ADPCM) về PCM s16le trên 1 core,
+so sánh với bộ giải IMA-ADPCM tuần tự (thuần Python) để kiểm tra kết quả.
+
+    python benchmarks/bench_audio_decode.py --seconds 600 --packet-ms 100
+"""
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+
+# Nạp trực tiếp module audio_codec (chỉ phụ thuộc NumPy) để không phải khởi tạo cả app
+_spec = importlib.util.spec_from_file_location(
+    "audio_codec",
+    os.path.join(os.path.dirname(__file__), "..", "app", "services", "audio_codec.py"),
+)
+audio_codec = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(audio_codec)
+
+SAMPLE_RATE = 16000
+
+
+def reference_ima_block(block):
+    """Giải 1 block IMA-ADPCM tuần tự, dùng làm chuẩn so sánh."""
+    steps = audio_codec.IMA_STEP_TABLE.tolist()
+    index_table = audio_codec.IMA_INDEX_TABLE.tolist()
+    predictor = int.from_bytes(block[0:2], "little", signed=True)
+    index = min(block[2], 88)
+    samples = [predictor]
+    for byte in block[4:]:
+        for code in (byte & 0x0F, byte >> 4):
+            step = steps[index]
+            diff = step >> 3
+            if code & 4:
+                diff += step
+            if code & 2:
+                diff += step >> 1
+            if code & 1:
+                diff += step >> 2
+            predictor = predictor - diff if code & 8 else predictor + diff
+            predictor = max(-32768, min(32767, predictor))
+            index = max(0, min(88, index + index_table[code]))
+            samples.append(predictor)
+    return np.array(samples, dtype="<i2").tobytes()
+
+
+def bench(label, decoder, packets, audio_seconds):
+    start = time.perf_counter()
+    produced = 0
+    for packet in packets:
+        produced += len(decoder.decode(packet))
+    elapsed = time.perf_counter() - start
+    wire = sum(len(p) for p in packets)
+    print(f"{label:<26} wire={wire / 2**20:7.2f} MiB  pcm={produced / 2**20:7.2f} MiB  "
+          f"{wire / 2**20 / elapsed:8.1f} MiB/s in  {audio_seconds / elapsed:9.0f}x realtime")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=600)
+    parser.add_argument("--packet-ms", type=int, default=100)
+    parser.add_argument("--block-align", type=int, default=audio_codec.DEFAULT_ADPCM_BLOCK_ALIGN)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    samples = int(args.seconds * SAMPLE_RATE)
+    packet_samples = SAMPLE_RATE * args.packet_ms // 1000
+
+    # Byte ngẫu nhiên đều là dữ liệu μ-law / ADPCM hợp lệ
+    ulaw = rng.integers(0, 256, size=samples, dtype=np.uint8).tobytes()
+    ulaw_packets = [ulaw[i:i + packet_samples] for i in range(0, len(ulaw), packet_samples)]
+
+    block_samples = 1 + (args.block_align - 4) * 2
+    n_blocks = max(1, samples // block_samples)
+    adpcm = rng.integers(0, 256, size=n_blocks * args.block_align, dtype=np.uint8).tobytes()
+    adpcm_packet = max(1, packet_samples // 2)
+    adpcm_packets = [adpcm[i:i + adpcm_packet] for i in range(0, len(adpcm), adpcm_packet)]
+    adpcm_seconds = n_blocks * block_samples / SAMPLE_RATE
+
+    # Kiểm tra cả 2 nhánh (tuần tự / vector hoá) khớp bộ giải tham chiếu
+    for count in (3, audio_codec.ADPCM_VECTOR_MIN_BLOCKS):
+        check = adpcm[:count * args.block_align]
+        expected = b"".join(reference_ima_block(check[i:i + args.block_align])
+                            for i in range(0, len(check), args.block_align))
+        assert audio_codec.decode_ima_adpcm_blocks(check, args.block_align) == expected, "ADPCM mismatch"
+
+    print(f"audio={args.seconds:.0f}s packet={args.packet_ms}ms block_align={args.block_align}")
+    bench("mulaw", audio_codec.AudioDecoder("mulaw"), ulaw_packets, args.seconds)
+    bench("ima_adpcm (per packet)", audio_codec.AudioDecoder("ima_adpcm", args.block_align),
+          adpcm_packets, adpcm_seconds)
+    bench("ima_adpcm (one batch)", audio_codec.AudioDecoder("ima_adpcm", args.block_align),
+          [adpcm], adpcm_seconds)
+
+    start = time.perf_counter()
+    sample_blocks = min(n_blocks, 200)
+    for i in range(sample_blocks):
+        reference_ima_block(adpcm[i * args.block_align:(i + 1) * args.block_align])
+    elapsed = time.perf_counter() - start
+    print(f"{'ima_adpcm (reference)':<26} {sample_blocks * block_samples / SAMPLE_RATE / elapsed:9.0f}x realtime")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark recall@k của index int8 (quét codes + re-rank shortlist bằng float32)
+so với tìm kiếm chính xác float32, trên dữ liệu embedding tổng hợp.
+
+    python benchmarks/bench_quantized_recall.py --rows 50000 --dim 1536 --k 5
+"""
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+
+# Nạp trực tiếp module quantization (chỉ phụ thuộc NumPy) để không phải khởi tạo cả app
+_spec = importlib.util.spec_from_file_location(
+    "quantization",
+    os.path.join(os.path.dirname(__file__), "..", "app", "services", "quantization.py"),
+)
+quantization = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(quantization)
+
+
+def make_corpus(rows, dim, clusters, seed):
+    """Embedding dạng cụm (giống văn bản cùng chủ đề) đã chuẩn hoá."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    data = centers[labels] + 0.6 * rng.normal(size=(rows, dim)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data, centers, rng
+
+
+def make_queries(centers, count, rng):
+    dim = centers.shape[1]
+    picks = rng.integers(0, centers.shape[0], size=count)
+    queries = centers[picks] + 0.8 * rng.normal(size=(count, dim)).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def recall(found, expected):
+    return len(set(found.tolist()) & set(expected.tolist())) / len(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--rerank-factor", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data, centers, rng = make_corpus(args.rows, args.dim, args.clusters, args.seed)
+    queries = make_queries(centers, args.queries, rng)
+    codes, scales = quantization.quantize_int8(data)
+
+    shortlist_size = args.k * args.rerank_factor
+    recall_first_pass, recall_reranked = [], []
+    t_exact = t_quant = 0.0
+
+    for q in queries:
+        start = time.perf_counter()
+        expected = quantization.top_k_indexes(data @ q, args.k)
+        t_exact += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx = quantization.int8_scores(codes, scales, q)
+        shortlist = quantization.top_k_indexes(approx, shortlist_size)
+        # Re-rank: trong app vector gốc được đọc từ Chunk, ở đây lấy từ ma trận float32
+        exact_scores = data[shortlist] @ q
+        reranked = shortlist[quantization.top_k_indexes(exact_scores, args.k)]
+        t_quant += time.perf_counter() - start
+
+        recall_first_pass.append(recall(shortlist[:args.k], expected))
+        recall_reranked.append(recall(reranked, expected))
+
+    n = len(queries)
+    print(f"rows={args.rows} dim={args.dim} k={args.k} shortlist={shortlist_size} queries={n}")
+    print(f"memory float32: {data.nbytes / 2**20:.1f} MiB")
+    print(f"memory int8:    {(codes.nbytes + scales.nbytes) / 2**20:.1f} MiB")
+    print(f"recall@{args.k} int8 first pass: {np.mean(recall_first_pass):.4f}")
+    print(f"recall@{args.k} int8 + re-rank:  {np.mean(recall_reranked):.4f}")
+    print(f"latency exact:  {1000 * t_exact / n:.2f} ms/query")
+    print(f"latency int8:   {1000 * t_quant / n:.2f} ms/query (incl. re-rank)")
+
+
+if __name__ == "__main__":
+    main()
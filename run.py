@@ -1,13 +1,75 @@
 import os
+import signal
 import eventlet
 
 eventlet.monkey_patch()
 
+from eventlet import wsgi
 from app import create_app
+from app.config import Config
 from app.extensions import socketio
 
-app = create_app()
 
-if __name__ == "__main__":
-    port = int(os.environ.get("PORT", "5000"))
-    socketio.run(app, host="0.0.0.0", port=port, debug=False, use_reloader=False)
+def serve_worker(port):
+    # Mỗi worker tạo app riêng sau khi fork (Mongo client, gateway, job worker không dùng chung được)
+    app = create_app()
+    # SO_REUSEPORT: kernel chia kết nối mới đều cho các worker cùng port
+    sock = eventlet.listen(("0.0.0.0", port), reuse_port=True)
+    wsgi.server(sock, app, log_output=False)
+
+
+def run_workers(port, workers):
+    """
+    Chạy N worker eventlet trên cùng port. Client cần dùng transport websocket
+    (long-polling cần sticky session); emit chéo worker đi qua SOCKETIO_MESSAGE_QUEUE.
+    """
+    def spawn(target, *args):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                target(*args)
+            finally:
+                os._exit(0)
+        return pid
+
+    broker_pid = None
+    if Config.SESSION_REGISTRY_URL.startswith("unix://"):
+        from app.services.session_registry import run_broker
+        broker_pid = spawn(run_broker, Config.SESSION_REGISTRY_URL[len("unix://"):])
+
+    children = {spawn(serve_worker, port) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children | ({broker_pid} if broker_pid else set()):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        pid, status = os.wait()
+        if pid == broker_pid:
+            if not stopping:
+                print(f"Session broker exited ({status}), restarting")
+                broker_pid = spawn(run_broker, Config.SESSION_REGISTRY_URL[len("unix://"):])
+            continue
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited ({status}), restarting")
+            children.add(spawn(serve_worker, port))
+
+
+if __name__ == "__main__" and Config.WEB_WORKERS > 1:
+    run_workers(int(os.environ.get("PORT", "5000")), Config.WEB_WORKERS)
+else:
+    app = create_app()
+
+    if __name__ == "__main__":
+        port = int(os.environ.get("PORT", "5000"))
+        socketio.run(app, host="0.0.0.0", port=port, debug=False, use_reloader=False)
@@ -0,0 +1,33 @@
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from app.services.chunking_service import chunk_transcript, pack_units  # noqa: E402
+
+
+def test_long_monologue_is_chunked_on_sentences_with_speaker_prefix():
+    lines = [f"Người 1: Đây là câu số {i} về kế hoạch tuần sau." for i in range(12)]
+    transcript = "\n".join(lines + ["Người 2: Đồng ý."])
+
+    chunks = chunk_transcript(transcript, max_tokens=60, overlap=1)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        # Mỗi dòng là 1 câu trọn vẹn, có tên người nói
+        for line in chunk.split("\n"):
+            assert line.startswith(("Người 1: ", "Người 2: "))
+            assert line.endswith(".")
+    # Chunk sau lặp lại câu cuối của chunk trước
+    for prev, nxt in zip(chunks, chunks[1:]):
+        assert nxt.split("\n")[0] == prev.split("\n")[-1]
+    assert chunks[-1].endswith("Người 2: Đồng ý.")
+
+
+
+def test_overlap_is_kept_when_previous_chunk_added_one_unit():
+    units = ["a" * 10, "b" * 10, "c" * 10, "d" * 10]
+    assert pack_units(units, max_tokens=13, overlap=1) == [
+        "aaaaaaaaaa bbbbbbbbbb",
+        "bbbbbbbbbb cccccccccc",
+        "cccccccccc dddddddddd",
+    ]